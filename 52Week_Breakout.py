@@ -1,55 +1,236 @@
+import argparse
+import csv
+import os
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from data_quality import clean_bars, report_quality
 from datetime import datetime, timedelta
+from instrumentation import add_profiling_arguments, configure_from_args, finish_from_args, record_fetch, stage
+from results_store import ResultsStore
+from rolling_extremes import RollingExtremesStore, refresh_symbol
+from tick_stream import TickAggregator, consume, poll_quotes, replay_file
+from trading_calendar import default_calendar
 
-# Step 1: Read the CSV file and extract the stock symbols
-try:
-    df = pd.read_csv('EQUITY_L.csv')
-    symbols = df['SYMBOL'].tolist()
-    print(f"Successfully read {len(symbols)} symbols from EQUITY_L.csv.")
-except Exception as e:
-    print(f"Error reading EQUITY_L.csv: {e}")
-    symbols = []
-
-# Step 2: Define the timeframe for the 52-week period
-end_date = datetime.today()
-start_date = end_date - timedelta(days=365)
-
-# Step 3: Function to check for fresh 52-week breakout
-def is_fresh_52_week_breakout(symbol):
+LIVE_FILE = "52_week_breakouts_live.csv"
+MAX_ENTRY_CHANGE = 3.5  # Trial26.calculate_position_size doesn't size trades up more than this
+
+# Step 1: Define the timeframe for the 52-week period: 252 sessions plus the one before them
+def breakout_window(end_date=None):
+    """Returns (start, end) dates to fetch for the 52-week check, ending with today (the default)."""
+    end_date = end_date or datetime.today()
+    return default_calendar().shift_sessions(end_date - timedelta(days=1), -252)[0], end_date
+
+# Step 2: Function to check for fresh 52-week breakout
+def is_fresh_52_week_breakout(symbol, hist=None):
+    """Returns the date of the breakout bar (the last bar evaluated), or None if it isn't a fresh breakout."""
     try:
-        stock = yf.Ticker(symbol + ".NS")  # Assuming Indian stocks with .NS suffix
-        hist = stock.history(start=start_date, end=end_date)
+        if hist is None:
+            with stage('fetch', symbol=symbol):
+                start_date, end_date = breakout_window()
+                stock = yf.Ticker(symbol + ".NS")  # Assuming Indian stocks with .NS suffix
+                hist = stock.history(start=start_date, end=end_date)
+                record_fetch(hist)
         
         if hist.empty:
             print(f"No historical data for {symbol}")
-            return False
+            return None
+        hist = clean_bars(symbol, hist)
+        if hist is None:
+            print(f"Skipping {symbol}: none of its bars passed validation.")
+            return None
         
-        # Calculate the 52-week high
-        hist['52_week_high'] = hist['High'].rolling(window=252, min_periods=1).max()
-        
-        latest_high = hist['High'].iloc[-1]
-        previous_52_week_high = hist['52_week_high'].iloc[-2]
+        with stage('compute', symbol=symbol):
+            # Calculate the 52-week high
+            hist['52_week_high'] = hist['High'].rolling(window=252, min_periods=1).max()
+            
+            latest_high = hist['High'].iloc[-1]
+            previous_52_week_high = hist['52_week_high'].iloc[-2]
         
         if latest_high > previous_52_week_high:
             print(f"{symbol} is a fresh 52-week breakout.")
-            return True
+            return hist.index[-1]
         else:
-            return False
+            return None
+    except Exception as e:
+        print(f"Error processing {symbol}: {e}")
+        return None
+
+def is_fresh_52_week_breakout_incremental(symbol, store):
+    """Same check as is_fresh_52_week_breakout, using the persisted rolling 52-week extremes.
+
+    Only the bars after the symbol's last update are downloaded.
+    """
+    ticker = symbol + ".NS"
+    try:
+        refresh_symbol(store, ticker)
     except Exception as e:
         print(f"Error processing {symbol}: {e}")
-        return False
-
-# Step 4: Check each symbol for a fresh 52-week breakout
-breakout_stocks = []
-for symbol in symbols:
-    if is_fresh_52_week_breakout(symbol):
-        breakout_stocks.append(symbol)
-
-# Step 5: Save the output to a new CSV file
-if breakout_stocks:
-    breakout_df = pd.DataFrame(breakout_stocks, columns=['SYMBOL'])
-    breakout_df.to_csv('52_week_breakouts.csv', index=False)
-    print("Breakout stocks saved in 52_week_breakouts.csv")
-else:
-    print("No breakout stocks found.")
+        return None
+
+    extremes = store.extremes(ticker)
+    if extremes is None:
+        print(f"No historical data for {symbol}")
+        return None
+    if extremes['previous_52_week_high'] is None:
+        return None
+    if extremes['last_high'] > extremes['previous_52_week_high']:
+        print(f"{symbol} is a fresh 52-week breakout.")
+        return extremes['last_date']
+    return None
+
+class LiveBreakoutDetector:
+    """Flags fresh 52-week breakouts while the session is trading.
+
+    The prior 252-session high and the previous close of every symbol are
+    preloaded into arrays, so each tick costs one comparison against its
+    symbol's slot. A symbol is flagged once per session: when it trades above
+    its 52-week high while still up less than `max_change` percent.
+    """
+
+    def __init__(self, symbols, highs, previous_closes, max_change=MAX_ENTRY_CHANGE, on_breakout=None):
+        self.aggregator = TickAggregator(symbols, levels=highs)
+        self.previous_close = np.asarray(previous_closes, dtype=float)
+        self.max_change = max_change
+        self.on_breakout = on_breakout
+        self.flagged = np.zeros(len(self.aggregator.symbols), dtype=bool)
+        self.breakouts = []
+
+    def reset(self):
+        """Starts a new session: clears the running bars and the flags."""
+        self.aggregator.reset()
+        self.flagged.fill(False)
+        self.breakouts = []
+
+    def on_tick(self, i, timestamp):
+        if self.flagged[i]:
+            return
+        price, level = self.aggregator.close[i], self.aggregator.levels[i]
+        if not price > level:
+            return
+        change_percent = (price - self.previous_close[i]) / self.previous_close[i] * 100
+        if change_percent >= self.max_change:
+            return
+        self.flagged[i] = True
+        breakout = {'Symbol': self.aggregator.symbols[i], 'Time': timestamp, 'Price': round(float(price), 2),
+                    '52 Week High': round(float(level), 2), 'Change %': round(float(change_percent), 2)}
+        self.breakouts.append(breakout)
+        if self.on_breakout is not None:
+            self.on_breakout(breakout)
+
+def load_live_levels(symbols):
+    """Prior 52-week highs and previous closes from the feature store's latest.npy.
+
+    Returns:
+        tuple: (tickers, highs, previous closes) for the symbols the store has.
+    """
+    from feature_store import FeatureStore
+
+    latest = FeatureStore().latest(['Close', 'High_52W'])
+    tickers = [t for t in (symbol.strip().upper() + ".NS" for symbol in symbols) if t in latest.index]
+    latest = latest.loc[tickers].dropna(subset=['Close', 'High_52W'])
+    session = default_calendar().last_completed_session()
+    stale = int((latest['Date'] < session).sum())
+    if stale:
+        print(f"Warning: {stale} symbols in the feature store end before the {session:%Y-%m-%d} session. "
+              "Run feature_store.py first.")
+    return latest.index.tolist(), latest['High_52W'].to_numpy(), latest['Close'].to_numpy()
+
+def save_live_breakout(breakout, filename=LIVE_FILE):
+    """Appends one live breakout to the CSV as soon as it is flagged."""
+    new_file = not os.path.isfile(filename)
+    with open(filename, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(breakout))
+        if new_file:
+            writer.writeheader()
+        writer.writerow(breakout)
+
+def run_live(symbols, tick_file=None, speed=None, interval=15.0):
+    """Watches a tick file or polled quotes for 52-week breakouts until the stream ends or Ctrl+C."""
+    tickers, highs, previous_closes = load_live_levels(symbols)
+    if not tickers:
+        print("No 52-week highs in the feature store. Run: python feature_store.py")
+        return []
+
+    def report(breakout):
+        print(f"{breakout['Time']} {breakout['Symbol']} broke its 52-week high {breakout['52 Week High']} "
+              f"at {breakout['Price']} ({breakout['Change %']}%).", flush=True)
+        save_live_breakout(breakout)
+
+    detector = LiveBreakoutDetector(tickers, highs, previous_closes, on_breakout=report)
+    if tick_file:
+        ticks = replay_file(tick_file, speed)
+    else:
+        from sizing_service import YahooQuoteSource
+        ticks = poll_quotes(tickers, YahooQuoteSource(), interval)
+    print(f"Watching {len(tickers)} symbols for 52-week breakouts...", flush=True)
+    try:
+        n = consume(detector.aggregator, ticks, detector.on_tick)
+        print(f"Processed {n} ticks.")
+    except KeyboardInterrupt:
+        print("Live scan stopped.")
+    return detector.breakouts
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan EQUITY_L.csv for fresh 52-week breakouts.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Use the saved rolling 52-week highs and download only new bars.")
+    parser.add_argument('--live', action='store_true',
+                        help=f"Flag breakouts during the session from streaming quotes (saved to {LIVE_FILE}).")
+    parser.add_argument('--ticks', help="With --live, replay this tick CSV instead of polling quotes.")
+    parser.add_argument('--speed', type=float, help="With --ticks, replay speed relative to real time.")
+    parser.add_argument('--interval', type=float, default=15.0, help="With --live, seconds between quote polls.")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    # Step 3: Read the CSV file and extract the stock symbols
+    try:
+        df = pd.read_csv('EQUITY_L.csv')
+        symbols = df['SYMBOL'].tolist()
+        print(f"Successfully read {len(symbols)} symbols from EQUITY_L.csv.")
+    except Exception as e:
+        print(f"Error reading EQUITY_L.csv: {e}")
+        symbols = []
+
+    if args.live:
+        breakouts = run_live(symbols, args.ticks, args.speed, args.interval)
+        print(f"{len(breakouts)} live breakouts saved in {LIVE_FILE}" if breakouts else "No breakout stocks found.")
+        finish_from_args(args)
+        return
+
+    # Step 4: Check each symbol for a fresh 52-week breakout
+    breakout_stocks = {}  # symbol -> date of the breakout bar
+    if args.incremental:
+        store = RollingExtremesStore.load()
+        for symbol in symbols:
+            date = is_fresh_52_week_breakout_incremental(symbol, store)
+            if date is not None:
+                breakout_stocks[symbol] = date
+        with stage('save'):
+            store.save()
+    else:
+        for symbol in symbols:
+            date = is_fresh_52_week_breakout(symbol)
+            if date is not None:
+                breakout_stocks[symbol] = date
+
+    # Step 5: Save the output to a new CSV file
+    if breakout_stocks:
+        with stage('save'):
+            breakout_df = pd.DataFrame(list(breakout_stocks), columns=['SYMBOL'])
+            breakout_df.to_csv('52_week_breakouts.csv', index=False)
+            results_store = ResultsStore()
+            hits = [{'Symbol': symbol, 'Date': date} for symbol, date in breakout_stocks.items()]
+            _, new, changed = results_store.record('52week_breakout', hits)
+            results_store.close()
+        print("Breakout stocks saved in 52_week_breakouts.csv")
+        print(f"{new} new and {changed} changed breakouts in the results store.")
+    else:
+        print("No breakout stocks found.")
+
+    report_quality()
+    finish_from_args(args)
+
+if __name__ == "__main__":
+    main()
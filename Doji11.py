@@ -1,91 +1,110 @@
+import argparse
 import yfinance as yf
 import pandas as pd
 import os
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from mplfinance.original_flavor import candlestick_ohlc
+from data_quality import clean_bars, report_quality
+from results_store import ResultsStore
+from instrumentation import add_profiling_arguments, configure_from_args, finish_from_args, record_fetch, stage
+from trading_calendar import default_calendar
 
 def fetch_stock_data(symbol, period='5d'):
     try:
-        # Adjusting the number of days to fetch based on the period
+        # Fetch exactly the last N completed sessions ('5d', '140d', ...) before today; 42 sessions by default
         end_date = datetime.now().date()
-        if period == '5d':
-            start_date = end_date - timedelta(days=7)  # around 1 week
-        elif period == '140d':
-            start_date = end_date - timedelta(days=200)  # around 200 days to ensure we get at least 140 trading days
-        else:
-            start_date = end_date - timedelta(days=60)  # default 60 days for other periods
-        
-        stock = yf.Ticker(symbol)
-        data = stock.history(start=start_date, end=end_date, interval='1d')
+        sessions = int(period[:-1]) if period.endswith('d') else 42
+        window = default_calendar().last_sessions(sessions, end_date - timedelta(days=1))
+        start_date, end_date = window[0].date(), window[-1].date() + timedelta(days=1)
+
+        with stage('fetch', symbol=symbol, period=period):
+            stock = yf.Ticker(symbol)
+            data = stock.history(start=start_date, end=end_date, interval='1d')
+            record_fetch(data)
 
         if data.empty:
             print(f"No data found for {symbol}. Possibly delisted or no trading data available.")
             return None
+        data = clean_bars(symbol, data)
+        if data is None:
+            print(f"Skipping {symbol}: none of its bars passed validation.")
+            return None
 
         return data
     except Exception as e:
         print(f"Error fetching data for {symbol}: {e}")
         return None
 
-def detect_doji_candles(data):
-    try:
-        # Calculate percentage difference threshold for doji
-        threshold = 0.002  # ±0.2%
+def doji_dates(data):
+    """Dates of the doji candles among the last 5 trading days, oldest first."""
+    # Calculate percentage difference threshold for doji
+    threshold = 0.002  # ±0.2%
+
+    dates = []
 
-        # Initialize counter for doji candles
-        doji_count = 0
+    # Loop through the last 5 trading days
+    for i in range(min(5, len(data))):  # Ensure we do not exceed available data
+        open_price = data['Open'].iloc[i]
+        close_price = data['Close'].iloc[i]
+        if not open_price > 0:
+            continue  # No valid open to measure the body against
 
-        # Loop through the last 5 trading days
-        for i in range(min(5, len(data))):  # Ensure we do not exceed available data
-            open_price = data['Open'].iloc[i]
-            close_price = data['Close'].iloc[i]
+        # Calculate percentage change
+        pct_change = abs(close_price - open_price) / open_price
 
-            # Calculate percentage change
-            pct_change = abs(close_price - open_price) / open_price
+        # Check if it's a doji candle
+        if pct_change <= threshold:
+            dates.append(data.index[i])
 
-            # Check if it's a doji candle
-            if pct_change <= threshold:
-                doji_count += 1
-        
-        return doji_count
+    return dates
 
+def detect_doji_candles(data):
+    try:
+        return len(doji_dates(data))
     except Exception as e:
         print(f"Error detecting doji candles: {e}")
         return 0
 
 def plot_candlestick(symbol, data):
+    # Plotting libraries are only loaded once there is something to plot
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    from mplfinance.original_flavor import candlestick_ohlc
     try:
-        # Convert DataFrame to the right format for candlestick_ohlc
-        data['Date'] = mdates.date2num(data.index.to_pydatetime())
-        ohlc = data[['Date', 'Open', 'High', 'Low', 'Close']]
-
-        fig, ax = plt.subplots()
-        candlestick_ohlc(ax, ohlc.values, width=0.6, colorup='g', colordown='r')
-
-        ax.xaxis_date()
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        plt.xticks(rotation=45)
-        plt.title(f'Candlestick chart for {symbol}')
-        plt.xlabel('Date')
-        plt.ylabel('Price')
-        plt.grid(True)
-        plt.tight_layout()
-
-        # Save plot as PNG file in the new directory
-        plot_dir = 'doji_candles_plots'
-        if not os.path.exists(plot_dir):
-            os.makedirs(plot_dir)
-        plot_file = os.path.join(plot_dir, f'{symbol}_candlestick.png')
-        plt.savefig(plot_file)
-        plt.close()
-
-        print(f"Saved candlestick plot for {symbol} to {plot_file}")
+        with stage('plot', symbol=symbol):
+            # Convert DataFrame to the right format for candlestick_ohlc
+            data['Date'] = mdates.date2num(data.index.to_pydatetime())
+            ohlc = data[['Date', 'Open', 'High', 'Low', 'Close']]
+
+            fig, ax = plt.subplots()
+            candlestick_ohlc(ax, ohlc.values, width=0.6, colorup='g', colordown='r')
+
+            ax.xaxis_date()
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+            plt.xticks(rotation=45)
+            plt.title(f'Candlestick chart for {symbol}')
+            plt.xlabel('Date')
+            plt.ylabel('Price')
+            plt.grid(True)
+            plt.tight_layout()
+
+            # Save plot as PNG file in the new directory
+            plot_dir = 'doji_candles_plots'
+            if not os.path.exists(plot_dir):
+                os.makedirs(plot_dir)
+            plot_file = os.path.join(plot_dir, f'{symbol}_candlestick.png')
+            plt.savefig(plot_file)
+            plt.close()
+
+            print(f"Saved candlestick plot for {symbol} to {plot_file}")
     except Exception as e:
         print(f"Error plotting candlestick chart for {symbol}: {e}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Scan EQUITY_L.csv for doji candles in the last 5 sessions.")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
     try:
         # Read stock symbols from the CSV file
         df = pd.read_csv('EQUITY_L.csv')
@@ -93,9 +112,6 @@ def main():
 
         results = []
 
-        # Current date for the scanning
-        scan_date = datetime.now().strftime('%Y-%m-%d')
-
         # Iterate over each symbol
         for symbol in symbols:
             symbol = symbol.strip().upper() + ".NS"  # Ensure symbol is in uppercase and append '.NS'
@@ -107,37 +123,54 @@ def main():
                 continue  # Skip to the next symbol if data fetch fails
             
             # Detect doji candles
-            doji_count = detect_doji_candles(data)
+            with stage('compute', symbol=symbol):
+                try:
+                    dates = doji_dates(data)
+                except Exception as e:
+                    print(f"Error detecting doji candles: {e}")
+                    dates = []
+                doji_count = len(dates)
 
             # Print and collect result if at least 2 doji candles detected
             if doji_count >= 2:
                 print(f"{symbol}: Detected {doji_count} doji candles.")
                 results.append({
                     'Symbol': symbol,
-                    'DojiCount': doji_count,
-                    'ScanDate': scan_date
+                    'Date': dates[-1],  # The newest doji, so later scans of the same dojis update this hit
+                    'DojiCount': doji_count
                 })
 
+        # Save results: hits already stored for the same doji are neither duplicated nor re-plotted
+        if results:
+            store = ResultsStore()
+            with stage('save'):
+                run_id, new, changed = store.record('doji', results)
+                delta = store.since('doji', run_id - 1, run_id)
+            print(f"\n{new} new and {changed} changed doji hits.")
+
+            for symbol in delta['Symbol']:
                 # Fetch stock data for the last 140 trading sessions
                 data_140d = fetch_stock_data(symbol, period='140d')
                 if data_140d is not None:
                     # Generate and save candlestick plot
                     plot_candlestick(symbol, data_140d)
 
-        # Save results to CSV file
-        if results:
-            results_df = pd.DataFrame(results)
-            output_file = 'doji_candles_detection_results.csv'
-            if os.path.exists(output_file):
-                results_df.to_csv(output_file, mode='a', header=False, index=False)
-            else:
-                results_df.to_csv(output_file, index=False)
-            print(f"\nResults saved to {output_file}.")
+            with stage('save'):
+                output_file = 'doji_candles_detection_results.csv'
+                # This run's hits only: premarket.py reads the file as today's shortlist
+                results_df = pd.DataFrame(results).rename(columns={'Date': 'DojiDate'})
+                results_df['DojiDate'] = pd.to_datetime(results_df['DojiDate']).dt.strftime('%Y-%m-%d')
+                results_df[['Symbol', 'DojiCount', 'DojiDate']].to_csv(output_file, index=False)
+            store.close()
+            print(f"Results saved to {output_file}.")
         else:
             print("No symbols found with at least 2 doji candles in the last 5 trading sessions.")
 
     except Exception as e:
         print(f"Error: {e}")
 
+    report_quality()
+    finish_from_args(args)
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,10 @@
+import argparse
 import pandas as pd
 import yfinance as yf
+from data_quality import clean_bars, report_quality
+from feature_store import FeatureStore
+from results_store import ResultsStore
+from instrumentation import add_profiling_arguments, configure_from_args, finish_from_args, record_fetch, stage
 
 # Function to calculate moving averages and identify Golden Crossovers
 def golden_cross(stock_data, short_window=50, long_window=200):
@@ -11,46 +16,85 @@ def golden_cross(stock_data, short_window=50, long_window=200):
     
     return stock_data
 
-# Read stock symbols from the CSV file
-stocks_df = pd.read_csv('EQUITY_L.csv')
-symbols = stocks_df['SYMBOL'].tolist()
-
-# Store results in a list
-results = []
-
-# Iterate through each symbol and perform Golden Crossover calculation
-for symbol in symbols:
-    print(f"Processing {symbol}...")
-    try:
-        stock_data = yf.download(symbol + ".NS", period="1y", interval="1d")  # ".NS" is used for NSE symbols on Yahoo Finance
-        if stock_data.empty:
-            print(f"No data found for {symbol}")
-            continue
-        stock_data.reset_index(inplace=True)  # Ensure 'Date' is a column
-        
-        stock_data = golden_cross(stock_data)
+def golden_cross_from_features(store, ticker):
+    """Same columns as golden_cross(), read from the feature store's SMA_50/SMA_200 instead of recomputed."""
+    stock_data = store.features(ticker, ['Close', 'SMA_50', 'SMA_200']).rename(
+        columns={'SMA_50': 'Short_MA', 'SMA_200': 'Long_MA'}).reset_index()
+    stock_data['Golden_Crossover'] = (stock_data['Short_MA'] > stock_data['Long_MA']) & (stock_data['Short_MA'].shift(1) <= stock_data['Long_MA'].shift(1))
+    return stock_data
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan EQUITY_L.csv for recent golden crossovers.")
+    parser.add_argument('--features', action='store_true',
+                        help="Read the moving averages from the feature store instead of downloading history.")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    # Read stock symbols from the CSV file
+    stocks_df = pd.read_csv('EQUITY_L.csv')
+    symbols = stocks_df['SYMBOL'].tolist()
+
+    # Store results in a list
+    results = []
+    store = FeatureStore() if args.features else None
+
+    # Iterate through each symbol and perform Golden Crossover calculation
+    for symbol in symbols:
+        print(f"Processing {symbol}...")
+        try:
+            if store is not None:
+                with stage('compute', symbol=symbol):
+                    stock_data = golden_cross_from_features(store, symbol + ".NS")
+            else:
+                with stage('fetch', symbol=symbol):
+                    stock_data = yf.download(symbol + ".NS", period="1y", interval="1d")  # ".NS" is used for NSE symbols on Yahoo Finance
+                    record_fetch(stock_data)
+            if stock_data.empty:
+                print(f"No data found for {symbol}")
+                continue
+            if store is None:
+                stock_data = clean_bars(symbol, stock_data)
+                if stock_data is None:
+                    print(f"Skipping {symbol}: none of its bars passed validation.")
+                    continue
+            with stage('compute', symbol=symbol):
+                if store is None:
+                    stock_data.reset_index(inplace=True)  # Ensure 'Date' is a column
+                    stock_data = golden_cross(stock_data)
         
-        # Convert the 'Date' column to datetime.date for comparison
-        stock_data['Date'] = pd.to_datetime(stock_data['Date']).dt.date
+                # Convert the 'Date' column to datetime.date for comparison
+                stock_data['Date'] = pd.to_datetime(stock_data['Date']).dt.date
         
-        # Filter rows where Golden Crossover is identified within the last 7 sessions
-        recent_golden_crosses = stock_data[stock_data['Golden_Crossover']].copy()
-        if not recent_golden_crosses.empty:
-            cutoff_date = (pd.Timestamp.now() - pd.DateOffset(days=10)).date()
-            recent_golden_crosses = recent_golden_crosses[recent_golden_crosses['Date'] >= cutoff_date]
-            if not recent_golden_crosses.empty:
-                recent_golden_crosses.loc[:, 'Symbol'] = symbol
-                results.append(recent_golden_crosses[['Symbol', 'Date', 'Close', 'Short_MA', 'Long_MA', 'Golden_Crossover']])
+                # Filter rows where Golden Crossover is identified within the last 7 sessions
+                recent_golden_crosses = stock_data[stock_data['Golden_Crossover']].copy()
+                if not recent_golden_crosses.empty:
+                    cutoff_date = (pd.Timestamp.now() - pd.DateOffset(days=10)).date()
+                    recent_golden_crosses = recent_golden_crosses[recent_golden_crosses['Date'] >= cutoff_date]
+                    if not recent_golden_crosses.empty:
+                        recent_golden_crosses.loc[:, 'Symbol'] = symbol
+                        results.append(recent_golden_crosses[['Symbol', 'Date', 'Close', 'Short_MA', 'Long_MA', 'Golden_Crossover']])
         
-    except Exception as e:
-        print(f"Error processing {symbol}: {e}")
-
-# Concatenate all results
-if results:
-    final_df = pd.concat(results)
-
-    # Save to a new CSV file
-    final_df.to_csv('golden_cross_results.csv', index=False)
-    print("Golden Crossover scan completed and results saved to golden_cross_results.csv")
-else:
-    print("No Golden Crossovers found.")
+        except Exception as e:
+            print(f"Error processing {symbol}: {e}")
+
+    # Concatenate all results
+    if results:
+        final_df = pd.concat(results)
+
+        # Save to a new CSV file
+        with stage('save'):
+            final_df.to_csv('golden_cross_results.csv', index=False)
+            results_store = ResultsStore()
+            _, new, changed = results_store.record('golden_cross', final_df.drop(columns='Golden_Crossover').to_dict('records'))
+            results_store.close()
+        print("Golden Crossover scan completed and results saved to golden_cross_results.csv")
+        print(f"{new} new and {changed} changed golden crosses in the results store.")
+    else:
+        print("No Golden Crossovers found.")
+
+    report_quality()
+    finish_from_args(args)
+
+if __name__ == "__main__":
+    main()
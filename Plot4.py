@@ -1,19 +1,23 @@
-import yfinance as yf
-import mplfinance as mpf
+from bar_store import get_bars
+from chart_renderer import render_chart
 
 def plot_candlestick_chart(ticker, period='3mo', interval='1d'):
-    # Retrieve historical market data
-    stock = yf.Ticker(ticker)
+    # Retrieve historical market data; coarser intervals are resampled from bars already on disk
     try:
-        hist = stock.history(period=period, interval=interval)
+        hist = get_bars(ticker, period, interval)
     except ValueError as e:
         if "is not supported" in str(e):
-            print(f"Invalid input - interval={interval} is not supported.")
+            print(f"Invalid input - {e}")
             print("Valid intervals: [1m, 3m, 5m, 30m, 45m, 1h, 1d, 1wk, 1mo]")
             return
+        raise
 
-    # Plotting the candlestick chart with stock name
-    mpf.plot(hist, type='candle', style='charles', volume=True, title=ticker)
+    if hist.empty:
+        print(f"No data found for {ticker}.")
+        return
+
+    # Plotting the candlestick chart with stock name (downsampled to the screen width and cached)
+    render_chart(ticker, hist, period, interval, show=True)
 
 if __name__ == "__main__":
     ticker = input("Enter stock ticker symbol: ").upper()
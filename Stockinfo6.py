@@ -1,40 +1,57 @@
-import yfinance as yf
-import mplfinance as mpf
+import argparse
 import csv
 import os
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from bar_store import get_bars, period_days, slice_period
+from data_quality import clean_bars, report_quality
+from fundamentals_cache import load_fundamentals, load_many
+from rolling_extremes import RollingExtremesStore, completed_bars, refresh_symbol
 
 def format_to_thousand_crores(value):
     return value / 1e7
 
-def get_stock_info(ticker):
-    stock = yf.Ticker(ticker)
-    
-    # Get historical market data for the past year
-    hist = stock.history(period="1y")
-    
-    # Calculate highest/lowest price and volume over the last 365 days
-    highest_price = hist['Close'].max()
-    lowest_price = hist['Close'].min()
-    highest_volume = hist['Volume'].max()
-    lowest_volume = hist['Volume'].min()
+def get_stock_info(ticker, fundamentals=None, extremes_store=None, hist=None):
+    # Highest/lowest price and volume over the last 365 days come from the rolling
+    # extremes store, which only downloads the bars added since the last run
+    # (or none at all when the caller already has the daily history in `hist`)
+    save_store = extremes_store is None
+    if extremes_store is None:
+        extremes_store = RollingExtremesStore.load()
+    if hist is not None:
+        bars = clean_bars(ticker, completed_bars(hist))
+        if bars is not None and not bars.empty:  # Quarantined bars are never frozen into the rolling windows
+            extremes_store.update_from_history(ticker, bars)
+    else:
+        refresh_symbol(extremes_store, ticker)
+    if save_store:
+        extremes_store.save()
+    extremes = extremes_store.extremes(ticker)
+    if extremes is None:
+        raise ValueError(f"No historical data for {ticker}")
+
+    highest_price = extremes['highest_close']
+    lowest_price = extremes['lowest_close']
+    highest_volume = extremes['highest_volume']
+    lowest_volume = extremes['lowest_volume']
     
+    # Fundamentals come from the quarterly cache (one info/financials fetch per ticker per quarter)
+    if fundamentals is None:
+        fundamentals = load_fundamentals(ticker)
+    if fundamentals is None:
+        raise ValueError(f"No fundamentals for {ticker}")
+    info = fundamentals['info']
+
     # Get Market Cap
-    market_cap = stock.info.get('marketCap', 'N/A')
+    market_cap = info['marketCap']
     
-    # Get Revenue and Profit for the last 4 quarters
-    financials = stock.financials
-    revenues = financials.loc['Total Revenue']
-    profits = financials.loc['Net Income']
-    
-    # Only keep the last 4 quarters
-    last_4_quarters_revenue = revenues[:4]
-    last_4_quarters_profit = profits[:4]
+    # Revenue and Profit for the last 4 quarters
+    last_4_quarters_revenue = fundamentals['revenue']
+    last_4_quarters_profit = fundamentals['profit']
     
     # Additional info (like sector, industry, and P/E ratio)
-    sector = stock.info.get('sector', 'N/A')
-    industry = stock.info.get('industry', 'N/A')
-    pe_ratio = stock.info.get('trailingPE', 'N/A')
+    sector = info['sector']
+    industry = info['industry']
+    pe_ratio = info['trailingPE']
 
     # Display the information
     print(f"\nStock Ticker: {ticker}")
@@ -121,14 +138,15 @@ def save_to_files(all_stock_data):
     print(f"\nStock information saved to {csv_file} and {text_file}")
 
 def plot_candlestick_chart(ticker, period='1mo'):
+    from chart_renderer import render_chart  # matplotlib/mplfinance load only when a chart is drawn
     # Retrieve historical market data
-    stock = yf.Ticker(ticker)
-    hist = stock.history(period=period)
+    hist = get_bars(ticker, period, '1d')
 
-    # Plotting the candlestick chart
-    mpf.plot(hist, type='candle', style='charles', volume=True)
+    # Plotting the candlestick chart (downsampled to the screen width and cached)
+    render_chart(ticker, hist, period, '1d', show=True)
 
-def plot_revenue_and_profit(stock_data, revenues, profits):
+def plot_revenue_and_profit(stock_data, revenues, profits, save_to=None):
+    import matplotlib.pyplot as plt
     quarters = ["Quarter 1", "Quarter 2", "Quarter 3", "Quarter 4"]
     revenue_labels = [f"{quarters[i]} Revenue" for i in range(len(revenues))]
     profit_labels = [f"{quarters[i]} Profit" for i in range(len(profits))]
@@ -152,16 +170,92 @@ def plot_revenue_and_profit(stock_data, revenues, profits):
     plt.xticks(rotation=45)
 
     plt.tight_layout()
-    plt.show()
+    if save_to:
+        plt.savefig(save_to)
+        plt.close()
+    else:
+        plt.show()
+
+def export_charts(stock_data, hist, period, out_dir):
+    """Worker for the batch export: saves one stock's candlestick and revenue/profit charts."""
+    import matplotlib.pyplot as plt
+    from chart_renderer import render_chart
+    plt.switch_backend('Agg')
+    ticker = stock_data["Stock Ticker"]
+    candlestick_file = render_chart(ticker, slice_period(hist, period), period, '1d', cache_dir=out_dir)
+    revenue_profit_file = os.path.join(out_dir, f"{ticker}_revenue_profit.png")
+    plot_revenue_and_profit(stock_data, stock_data["Last 4 Quarters Revenue"],
+                            stock_data["Last 4 Quarters Profit"], save_to=revenue_profit_file)
+    return candlestick_file, revenue_profit_file
+
+def export_report_pack(tickers, period='3mo', out_dir='stock_reports', workers=4):
+    """Non-interactive report: stock info files plus candlestick and revenue/profit charts for every ticker.
+
+    Each ticker's daily history is downloaded once and used both for the
+    365-day highs/lows and for its candlestick chart; the charts are rendered
+    in parallel worker processes.
+    """
+    fundamentals = load_many(tickers)
+    extremes_store = RollingExtremesStore.load()
+    history_period = period if period_days(period) > period_days('1y') else '1y'
+    jobs = []
+    for ticker in tickers:
+        if ticker not in fundamentals:
+            print(f"Skipping {ticker}: no fundamentals.")
+            continue
+        try:
+            hist = get_bars(ticker, history_period, '1d')
+            stock_data, revenues, profits = get_stock_info(ticker, fundamentals[ticker], extremes_store, hist)
+        except Exception as e:
+            print(f"Error processing {ticker}: {e}")
+            continue
+        jobs.append((stock_data, hist))
+    extremes_store.save()
+    report_quality()
+    save_to_files([stock_data for stock_data, _ in jobs])
+
+    os.makedirs(out_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(export_charts, stock_data, hist, period, out_dir) for stock_data, hist in jobs]
+        for (stock_data, _), future in zip(jobs, futures):
+            try:
+                files = future.result()
+                print(f"Saved charts for {stock_data['Stock Ticker']}: {', '.join(f for f in files if f)}")
+            except Exception as e:
+                print(f"Error exporting charts for {stock_data['Stock Ticker']}: {e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Stock info report with charts.")
+    parser.add_argument('--export', metavar='TICKERS',
+                        help="Comma separated tickers; write the report and charts without prompting.")
+    parser.add_argument('--period', default='3mo', help="Candlestick chart period for --export.")
+    parser.add_argument('--out-dir', default='stock_reports', help="Chart directory for --export.")
+    parser.add_argument('--workers', type=int, default=4, help="Chart rendering processes for --export.")
+    args = parser.parse_args()
+
+    if args.export:
+        tickers = [ticker.strip() for ticker in args.export.upper().split(',') if ticker.strip()]
+        export_report_pack(tickers, args.period, args.out_dir, args.workers)
+        return
 
-if __name__ == "__main__":
     tickers = input("Enter stock ticker symbols (comma separated): ").upper().split(',')
     
-    # Retrieve and save stock information
+    # Load fundamentals for all tickers in one concurrent batch, then retrieve and save stock information
+    fundamentals = load_many([ticker.strip() for ticker in tickers])
+    extremes_store = RollingExtremesStore.load()
     all_stock_data = []
     for ticker in tickers:
-        stock_data, revenues, profits = get_stock_info(ticker.strip())
+        if ticker.strip() not in fundamentals:
+            print(f"Skipping {ticker.strip()}: no fundamentals.")
+            continue
+        try:
+            stock_data, revenues, profits = get_stock_info(ticker.strip(), fundamentals[ticker.strip()],
+                                                           extremes_store)
+        except Exception as e:
+            print(f"Error processing {ticker.strip()}: {e}")
+            continue
         all_stock_data.append(stock_data)
+    extremes_store.save()
     
     save_to_files(all_stock_data)
 
@@ -185,3 +279,6 @@ if __name__ == "__main__":
             revenues = stock_data["Last 4 Quarters Revenue"]
             profits = stock_data["Last 4 Quarters Profit"]
             plot_revenue_and_profit(stock_data, revenues, profits)
+
+if __name__ == "__main__":
+    main()
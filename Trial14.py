@@ -3,22 +3,6 @@ import datetime
 import csv
 import os
 
-def get_last_trading_day():
-    """Returns the last trading day (i.e., a weekday that is not a holiday)."""
-    today = datetime.datetime.now()
-    # Define known trading holidays for 2024 in YYYY-MM-DD format.
-    trading_holidays = [
-        "2024-01-26", "2024-03-29", "2024-04-08", "2024-04-14", "2024-05-01",
-        "2024-08-15", "2024-08-19", "2024-10-02", "2024-10-31", "2024-11-15",
-        "2024-12-25"
-    ]
-    
-    # Check if today is a weekend or a trading holiday.
-    while today.weekday() > 4 or today.strftime("%Y-%m-%d") in trading_holidays:
-        today -= datetime.timedelta(days=1)  # Go back one day.
-    
-    return today.strftime("%Y-%m-%d")
-
 def get_stock_data(stock_symbol):
     """Fetches the price and percentage change for a given stock symbol from Yahoo Finance.
 
@@ -30,7 +14,6 @@ def get_stock_data(stock_symbol):
     """
     try:
         stock = yf.Ticker(stock_symbol)
-        last_trading_day = get_last_trading_day()
         data = stock.history(period="5d")  # Get data for the last five days
         
         if len(data) >= 2:
@@ -1,23 +1,8 @@
-import yfinance as yf
 import datetime
 import csv
+import importlib
 import os
-
-def get_last_trading_day():
-    """Returns the last trading day (i.e., a weekday that is not a holiday)."""
-    today = datetime.datetime.now()
-    # Define known trading holidays for 2024 in YYYY-MM-DD format.
-    trading_holidays = [
-        "2024-01-26", "2024-03-29", "2024-04-08", "2024-04-14", "2024-05-01",
-        "2024-08-15", "2024-08-19", "2024-10-02", "2024-10-31", "2024-11-15",
-        "2024-12-25"
-    ]
-    
-    # Check if today is a weekend or a trading holiday.
-    while today.weekday() > 4 or today.strftime("%Y-%m-%d") in trading_holidays:
-        today -= datetime.timedelta(days=1)  # Go back one day.
-    
-    return today.strftime("%Y-%m-%d")
+import threading
 
 def get_stock_data(stock_symbol):
     """Fetches the price and percentage change for a given stock symbol from Yahoo Finance.
@@ -28,9 +13,9 @@ def get_stock_data(stock_symbol):
     Returns:
         tuple: A tuple containing the price (str), percentage change (str), or None if the data is not found.
     """
+    import yfinance as yf  # Imported on first use to keep startup fast
     try:
         stock = yf.Ticker(stock_symbol)
-        last_trading_day = get_last_trading_day()
         data = stock.history(period="5d")  # Get data for the last five days
         
         if len(data) >= 2:
@@ -109,6 +94,7 @@ def calculate_position_size(capital, cmp, change_percent):
     return (position_size * 100, capital_deployed, max_risk, percentage_risk_per_entire_capital, no_of_shares), None
 
 def get_stop_loss(stock_symbol, use_day_low=False, ema_days=None):
+    import yfinance as yf
     try:
         stock = yf.Ticker(stock_symbol)
         if use_day_low:
@@ -144,6 +130,7 @@ def get_stop_loss(stock_symbol, use_day_low=False, ema_days=None):
 
 def get_last_session_close(stock_symbol):
     """Fetches the last session's closing price for a given stock symbol."""
+    import yfinance as yf
     try:
         stock = yf.Ticker(stock_symbol)
         data = stock.history(period="1d")
@@ -158,6 +145,8 @@ def get_last_session_close(stock_symbol):
         return None
 
 def main():
+    # Load yfinance in the background while the symbol is being typed
+    threading.Thread(target=importlib.import_module, args=("yfinance",), daemon=True).start()
     stock_symbol = input("Enter stock symbol (e.g., RELIANCE.NS): ")
     capital = 1445000
     
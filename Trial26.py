@@ -1,23 +1,8 @@
-import yfinance as yf
 import datetime
 import csv
+import importlib
 import os
-
-def get_last_trading_day():
-    """Returns the last trading day (i.e., a weekday that is not a holiday)."""
-    today = datetime.datetime.now()
-    # Define known trading holidays for 2024 in YYYY-MM-DD format.
-    trading_holidays = [
-        "2024-01-26", "2024-03-29", "2024-04-08", "2024-04-14", "2024-05-01",
-        "2024-08-15", "2024-08-19", "2024-10-02", "2024-10-31", "2024-11-15",
-        "2024-12-25"
-    ]
-    
-    # Check if today is a weekend or a trading holiday.
-    while today.weekday() > 4 or today.strftime("%Y-%m-%d") in trading_holidays:
-        today -= datetime.timedelta(days=1)  # Go back one day.
-    
-    return today.strftime("%Y-%m-%d")
+import threading
 
 def get_stock_data(stock_symbol):
     """Fetches the price and percentage change for a given stock symbol from Yahoo Finance.
@@ -28,9 +13,9 @@ def get_stock_data(stock_symbol):
     Returns:
         tuple: A tuple containing the price (str), percentage change (str), or None if the data is not found.
     """
+    import yfinance as yf  # Imported on first use to keep startup fast
     try:
         stock = yf.Ticker(stock_symbol)
-        last_trading_day = get_last_trading_day()
         data = stock.history(period="5d")  # Get data for the last five days
         
         if len(data) >= 2:
@@ -109,6 +94,7 @@ def calculate_position_size(capital, cmp, change_percent):
     return (position_size * 100, capital_deployed, max_risk, percentage_risk_per_entire_capital, no_of_shares), None
 
 def get_stop_loss(stock_symbol, use_day_low=False, ema_days=None):
+    import yfinance as yf
     try:
         stock = yf.Ticker(stock_symbol)
         if use_day_low:
@@ -142,8 +128,26 @@ def get_stop_loss(stock_symbol, use_day_low=False, ema_days=None):
         print(f"Error fetching stop loss data: {e}")
         return None
 
+def get_volatility_stop(stock_symbol, method='atr', multiplier=2.0):
+    """Stop loss `multiplier` ATRs (method='atr') or daily standard deviations (method='stddev') below the last close."""
+    import yfinance as yf
+    from volatility import panel, volatility_stops
+    try:
+        history_data = yf.Ticker(stock_symbol).history(period="3mo")
+        if len(history_data) < 20:
+            print("Not enough data to calculate volatility.")
+            return None
+        histories = {stock_symbol: history_data}
+        stops = volatility_stops(panel(histories, 'High'), panel(histories, 'Low'), panel(histories, 'Close'),
+                                 method, multiplier)
+        return stops[stock_symbol]
+    except Exception as e:
+        print(f"Error fetching volatility data: {e}")
+        return None
+
 def get_last_session_close(stock_symbol):
     """Fetches the last session's closing price for a given stock symbol."""
+    import yfinance as yf
     try:
         stock = yf.Ticker(stock_symbol)
         data = stock.history(period="1d")
@@ -158,6 +162,8 @@ def get_last_session_close(stock_symbol):
         return None
 
 def main():
+    # Load yfinance in the background while the symbol is being typed
+    threading.Thread(target=importlib.import_module, args=("yfinance",), daemon=True).start()
     stock_symbol = input("Enter stock symbol (e.g., RELIANCE.NS): ")
     capital = 1445000
     
@@ -190,8 +196,10 @@ def main():
             print("2. Last Session's Closing Price")
             print("3. Custom Stop Loss (Percentage of CMP)")
             print("4. EMA Stop Loss (Options: 5d, 7d, 9d, 12d, 15d, 18d, 21d, 50d)")
+            print("5. ATR Stop Loss (Multiple of 14-day ATR)")
+            print("6. Standard Deviation Stop Loss (Multiple of 20-day return std-dev)")
             
-            option = input("Enter option number (1/2/3/4): ").strip()
+            option = input("Enter option number (1/2/3/4/5/6): ").strip()
 
             if option == "1":
                 custom_stop_loss = get_stop_loss(stock_symbol, use_day_low=True)
@@ -226,6 +234,25 @@ def main():
                 else:
                     print("Unable to fetch EMA data. Using default stop loss.")
                     custom_stop_loss = get_stop_loss(stock_symbol)
+            elif option in ("5", "6"):
+                try:
+                    multiplier = float(input("Enter the volatility multiple (e.g., 2 for 2x): ") or 2)
+                except ValueError:
+                    print("Invalid input. Using 2x.")
+                    multiplier = 2.0
+                custom_stop_loss = get_volatility_stop(stock_symbol, 'atr' if option == "5" else 'stddev', multiplier)
+                if custom_stop_loss and custom_stop_loss < cmp:
+                    from volatility import volatility_shares
+                    # Size so the distance to the volatility stop risks at most 0.25% of capital
+                    no_of_shares = int(volatility_shares(capital, cmp, custom_stop_loss, max_shares=no_of_shares))
+                    capital_deployed = no_of_shares * cmp
+                    print(f"Volatility-scaled No of Shares: {no_of_shares}")
+                    if no_of_shares == 0:
+                        print("The volatility stop is too wide to risk only 0.25% of capital on one share.")
+                        return
+                else:
+                    print("Unable to calculate volatility stop. Using default stop loss.")
+                    custom_stop_loss = get_stop_loss(stock_symbol)
             else:
                 print("Invalid option selected. Using default stop loss.")
                 custom_stop_loss = get_stop_loss(stock_symbol)
@@ -256,6 +283,12 @@ def main():
 
             # Print the output
             print(output)
+            from portfolio_risk import BOOK_FILE, check_new_trade  # yfinance is already loaded by now
+            if os.path.isfile(BOOK_FILE):
+                try:
+                    check_new_trade(stock_symbol, no_of_shares, cmp, custom_stop_loss, capital)
+                except Exception as e:
+                    print(f"Error checking portfolio risk: {e}")
             save_to_csv([current_datetime, stock_symbol, price, change, position_size, 
                       capital_deployed, max_risk, percentage_risk_on_entire, no_of_shares, custom_stop_loss])
             save_to_text(output)
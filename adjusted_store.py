@@ -0,0 +1,217 @@
+import argparse
+import os
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from bar_store import OHLCV, BarStore
+from feature_store import FeatureStore
+from instrumentation import add_profiling_arguments, configure_from_args, count, finish_from_args, record_fetch, stage
+from rolling_extremes import RollingExtremesStore, completed_bars
+
+ADJUSTED_STORE_DIR = "adjusted_store"
+ACTIONS_FILE = "corporate_actions.csv"
+ACTION_COLUMNS = ['Ticker', 'Date', 'Dividend', 'Split']
+SEED_PERIOD = "2y"
+
+def _naive_dates(index):
+    index = index.tz_localize(None) if index.tz is not None else index
+    return index.normalize()
+
+def unsplit(hist):
+    """Undoes the split adjustment Yahoo applies even with auto_adjust=False.
+
+    Bars before each split in `hist` are multiplied back by the split ratio
+    (volume divided by it), so they are the prices that actually traded.
+    """
+    splits = hist['Stock Splits'].to_numpy(dtype=float)
+    splits = np.where(splits > 0, splits, 1.0)
+    later = np.cumprod(splits[::-1])[::-1] / splits  # Product of the splits after each bar
+    if np.all(later == 1):
+        return hist
+    hist = hist.copy()
+    hist[['Open', 'High', 'Low', 'Close']] = hist[['Open', 'High', 'Low', 'Close']].mul(later, axis=0)
+    hist['Volume'] = np.round(hist['Volume'] / later).astype('int64')
+    return hist
+
+def action_factors(raw, actions):
+    """Price and volume multipliers for the bars before each action, like Yahoo's adjustment.
+
+    A split of `s` divides earlier prices by `s` and multiplies earlier
+    volume by it; a dividend of `d` multiplies earlier prices by
+    1 - d / (raw close on the session before the ex-date).
+
+    Returns:
+        list: (ex_date, price_factor, volume_factor) per action, oldest first.
+    """
+    dates = _naive_dates(raw.index)
+    factors = []
+    for action in actions.sort_values('Date').itertuples():
+        ex_date = pd.Timestamp(action.Date)
+        k = int(dates.searchsorted(ex_date))
+        price_factor, volume_factor = 1.0, 1.0
+        if action.Split:
+            price_factor, volume_factor = 1 / action.Split, action.Split
+        if action.Dividend and k:
+            price_factor *= 1 - action.Dividend / raw['Close'].iloc[k - 1]
+        factors.append((ex_date, price_factor, volume_factor))
+    return factors
+
+def cumulative_factors(raw, actions):
+    """Per-bar cumulative (price, volume) factors: the product of every action after each bar."""
+    dates = _naive_dates(raw.index)
+    price, volume = np.ones(len(raw)), np.ones(len(raw))
+    for ex_date, price_factor, volume_factor in action_factors(raw, actions):
+        k = int(dates.searchsorted(ex_date))
+        if k:
+            price[k - 1] *= price_factor  # Recorded on the last bar before the ex-date...
+            volume[k - 1] *= volume_factor
+    # ...and carried back to every earlier bar by a reverse cumulative product
+    return np.cumprod(price[::-1])[::-1], np.cumprod(volume[::-1])[::-1]
+
+class AdjustedStore:
+    """Raw (unadjusted) daily bars plus a corporate-actions table; adjusted bars are derived on demand.
+
+    Raw bars never change once a session has closed, so updates only append.
+    Yahoo's auto_adjust=False bars are still split-adjusted, so each download
+    is unsplit() before it is stored.
+    A new split or dividend is one row in corporate_actions.csv: adjusted
+    series pick it up through the cumulative factors, and the caches built
+    from adjusted bars (bar store, feature store, rolling extremes) are
+    rescaled by the action's factor rather than downloaded again.
+
+    The screeners still read Yahoo's adjusted bars through the bar store;
+    here the raw bars are the corporate-action detector, and adjusted() is
+    for checking a cache against the raw series.
+    """
+
+    def __init__(self, directory=ADJUSTED_STORE_DIR):
+        self.directory = directory
+        self.actions_file = os.path.join(directory, ACTIONS_FILE)
+        self.actions = (pd.read_csv(self.actions_file, parse_dates=['Date']) if os.path.isfile(self.actions_file)
+                        else pd.DataFrame(columns=ACTION_COLUMNS))
+        self._adjusted = {}  # ticker -> ((bar count, action count) it was built from, adjusted frame)
+
+    def _path(self, ticker):
+        return os.path.join(self.directory, f"{ticker}.pkl")
+
+    def raw(self, ticker):
+        path = self._path(ticker)
+        return pd.read_pickle(path) if os.path.isfile(path) else None
+
+    def ticker_actions(self, ticker):
+        return self.actions[self.actions['Ticker'] == ticker]
+
+    def adjusted(self, ticker):
+        """Adjusted OHLCV for a ticker, computed from raw bars and its actions the first time it is asked for."""
+        raw = self.raw(ticker)
+        if raw is None:
+            return None
+        actions = self.ticker_actions(ticker)
+        key = (len(raw), len(actions))
+        cached = self._adjusted.get(ticker)
+        if cached is not None and cached[0] == key:
+            count('cache_hits')
+            return cached[1]
+        price, volume = cumulative_factors(raw, actions)
+        adjusted = raw[OHLCV].copy()
+        adjusted[['Open', 'High', 'Low', 'Close']] = raw[['Open', 'High', 'Low', 'Close']].mul(price, axis=0)
+        adjusted['Volume'] = np.round(raw['Volume'] * volume).astype('int64')
+        self._adjusted[ticker] = (key, adjusted)
+        return adjusted
+
+    def add_action(self, ticker, date, dividend=0.0, split=0.0):
+        """Records one corporate action. Returns False if it was already recorded."""
+        date = pd.Timestamp(date).normalize()
+        actions = self.ticker_actions(ticker)
+        if ((actions['Date'] == date) & (actions['Dividend'] == dividend) & (actions['Split'] == split)).any():
+            return False
+        row = pd.DataFrame([[ticker, date, dividend, split]], columns=ACTION_COLUMNS)
+        self.actions = pd.concat([self.actions, row], ignore_index=True) if len(self.actions) else row
+        return True
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_file = self.actions_file + ".tmp"
+        self.actions.to_csv(tmp_file, index=False, date_format='%Y-%m-%d')
+        os.replace(tmp_file, self.actions_file)
+
+    def update(self, ticker, seed_period=SEED_PERIOD):
+        """Appends new raw bars for a ticker and records any actions among them.
+
+        Returns:
+            list: (ex_date, price_factor, volume_factor) for each new action.
+        """
+        raw = self.raw(ticker)
+        stock = yf.Ticker(ticker)
+        with stage('fetch', symbol=ticker):
+            if raw is None:
+                hist = stock.history(period=seed_period, auto_adjust=False, actions=True)
+            else:
+                start = _naive_dates(raw.index)[-1].date() + timedelta(days=1)
+                hist = stock.history(start=start, auto_adjust=False, actions=True)
+            record_fetch(hist)
+        hist = completed_bars(hist)
+        if hist.empty:
+            return []
+        hist = unsplit(hist)  # The splits are recorded as actions below, so the stored bars must not carry them
+
+        new_actions = []
+        dates = _naive_dates(hist.index)
+        for date, dividend, split in zip(dates, hist['Dividends'], hist['Stock Splits']):
+            if (dividend or split) and self.add_action(ticker, date, float(dividend), float(split)):
+                new_actions.append(date)
+        seeded = raw is None
+        raw = hist[OHLCV] if seeded else pd.concat([raw, hist[OHLCV]])
+        os.makedirs(self.directory, exist_ok=True)
+        raw.to_pickle(self._path(ticker))
+        if seeded or not new_actions:
+            return []  # A freshly seeded ticker has no caches built on the old scale
+        return [factors for factors in action_factors(raw, self.ticker_actions(ticker)) if factors[0] in new_actions]
+
+def readjust_caches(ticker, factors, bar_store=None, feature_store=None, extremes_store=None):
+    """Rescales every cache built from adjusted bars for new corporate actions, newest action last."""
+    for ex_date, price_factor, volume_factor in factors:
+        with stage('compute', symbol=ticker):
+            if bar_store is not None:
+                bar_store.rescale(ticker, ex_date, price_factor, volume_factor)
+            if feature_store is not None:
+                feature_store.rescale(ticker, ex_date, price_factor, volume_factor)
+            if extremes_store is not None and ticker in extremes_store.symbols:
+                if not extremes_store.rescale(ticker, ex_date, price_factor, volume_factor):
+                    count('reseeds')
+        print(f"{ticker}: re-adjusted cached bars and indicators for the {ex_date:%Y-%m-%d} action "
+              f"(price x{price_factor:.6f}, volume x{volume_factor:g}).")
+
+def main():
+    parser = argparse.ArgumentParser(description="Update raw bars and corporate actions, re-adjusting caches in place.")
+    parser.add_argument('--symbols', nargs='+', help="NSE symbols to update (default: all of EQUITY_L.csv).")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    symbols = args.symbols or pd.read_csv('EQUITY_L.csv')['SYMBOL'].tolist()
+    store = AdjustedStore()
+    bar_store, feature_store, extremes_store = BarStore(), FeatureStore(), RollingExtremesStore.load()
+    actions = 0
+    for symbol in symbols:
+        ticker = symbol.strip().upper() + ".NS"
+        try:
+            factors = store.update(ticker)
+        except Exception as e:
+            print(f"Error updating {ticker}: {e}")
+            continue
+        readjust_caches(ticker, factors, bar_store, feature_store, extremes_store)
+        actions += len(factors)
+    with stage('save'):
+        store.save()
+        extremes_store.save()
+        if actions:
+            feature_store.write_latest()
+    print(f"Raw bars for {len(symbols)} symbols in {ADJUSTED_STORE_DIR}/; {actions} new corporate actions applied.")
+    finish_from_args(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import shutil
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from bar_store import OHLCV
+from instrumentation import add_profiling_arguments, configure_from_args, count, finish_from_args, record_fetch, stage
+
+ARCHIVE_DIR = "bar_archive"
+ARCHIVE_PERIOD = "10y"
+# Fixed-width column types; dates are stored as int64 nanoseconds (naive, exchange-local)
+COLUMN_DTYPES = {'Date': np.dtype('int64'), 'Open': np.dtype('float32'), 'High': np.dtype('float32'),
+                 'Low': np.dtype('float32'), 'Close': np.dtype('float32'), 'Volume': np.dtype('int64')}
+BLOCKS_FILE = "blocks.bin"
+INDEX_FILE = "index.json"
+COMPRESS_LEVEL = 6
+
+def _columns(hist):
+    """Column arrays of a yfinance-shaped frame in COLUMN_DTYPES."""
+    index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+    arrays = {'Date': index.values.astype('datetime64[ns]').view('int64')}
+    for column in OHLCV:
+        arrays[column] = hist[column].to_numpy(dtype=COLUMN_DTYPES[column])
+    return arrays
+
+def write_archive(histories, directory=ARCHIVE_DIR, compress=False):
+    """Writes (symbol, history) pairs into an archive, streaming one symbol at a time.
+
+    Uncompressed archives keep one flat file per column, so reads are
+    memory-mapped slices. Compressed archives keep one zlib block per
+    symbol in blocks.bin, which is decompressed on read. The new archive is
+    built next to the old one and swapped in when complete.
+
+    Returns:
+        int: Number of symbols written.
+    """
+    tmp_dir = directory.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    symbols = {}  # symbol -> [row offset, rows] or [byte offset, bytes, rows]
+    rows = offset = 0
+    files = ({BLOCKS_FILE: open(os.path.join(tmp_dir, BLOCKS_FILE), 'wb')} if compress else
+             {column: open(os.path.join(tmp_dir, f"{column}.bin"), 'wb') for column in COLUMN_DTYPES})
+    try:
+        for symbol, hist in histories:
+            if hist is None or hist.empty:
+                continue
+            arrays = _columns(hist.sort_index())
+            n = len(arrays['Date'])
+            if compress:
+                payload = b"".join(arrays[column].tobytes() for column in COLUMN_DTYPES)
+                block = zlib.compress(payload, COMPRESS_LEVEL)
+                files[BLOCKS_FILE].write(block)
+                symbols[symbol] = [offset, len(block), n]
+                offset += len(block)
+            else:
+                for column, f in files.items():
+                    arrays[column].tofile(f)
+                symbols[symbol] = [rows, n]
+            rows += n
+    finally:
+        for f in files.values():
+            f.close()
+    with open(os.path.join(tmp_dir, INDEX_FILE), 'w') as f:
+        json.dump({'compressed': compress, 'columns': {c: d.str for c, d in COLUMN_DTYPES.items()},
+                   'rows': rows, 'symbols': symbols}, f)
+
+    old_dir = directory.rstrip(os.sep) + ".old"
+    if os.path.isdir(directory):
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return len(symbols)
+
+class BarArchive:
+    """Read side of an archive written by write_archive().
+
+    Symbol lookups are a dict lookup plus array slicing: uncompressed
+    columns are memory-mapped once and sliced without copying, compressed
+    blocks are read from a memory-mapped blocks.bin and decompressed.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            index = json.load(f)
+        self.compressed = index['compressed']
+        self.dtypes = {column: np.dtype(dtype) for column, dtype in index['columns'].items()}
+        self.index = index['symbols']
+        if self.compressed:
+            path = os.path.join(directory, BLOCKS_FILE)
+            self.blocks = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else b""
+        else:
+            self.columns = {column: self._map(column, index['rows']) for column in self.dtypes}
+
+    def _map(self, column, rows):
+        if rows == 0:
+            return np.empty(0, dtype=self.dtypes[column])
+        mapped = np.memmap(os.path.join(self.directory, f"{column}.bin"), dtype=self.dtypes[column], mode='r',
+                           shape=(rows,))
+        return mapped.view(np.ndarray)  # Plain ndarray slices skip np.memmap's per-slice bookkeeping
+
+    def symbols(self):
+        return list(self.index)
+
+    def __contains__(self, symbol):
+        return symbol in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def rows(self, symbol):
+        """Number of bars archived for a symbol (0 if it isn't archived)."""
+        entry = self.index.get(symbol)
+        return entry[-1] if entry else 0
+
+    def arrays(self, symbol, columns=None):
+        """A symbol's columns as NumPy arrays (read-only views when uncompressed), or None if not archived."""
+        entry = self.index.get(symbol)
+        if entry is None:
+            return None
+        count('cache_hits')
+        columns = columns or list(self.dtypes)
+        if not self.compressed:
+            start, rows = entry
+            return {column: self.columns[column][start:start + rows] for column in columns}
+        start, size, rows = entry
+        buffer = zlib.decompress(self.blocks[start:start + size])
+        arrays, position = {}, 0
+        for column, dtype in self.dtypes.items():
+            if column in columns:
+                arrays[column] = np.frombuffer(buffer, dtype=dtype, count=rows, offset=position)
+            position += rows * dtype.itemsize
+        return arrays
+
+    def history(self, symbol):
+        """A symbol's bars as a yfinance-shaped DataFrame (Date index, OHLCV columns), or None."""
+        arrays = self.arrays(symbol)
+        if arrays is None:
+            return None
+        index = pd.DatetimeIndex(arrays['Date'].view('datetime64[ns]'), name='Date')
+        return pd.DataFrame({column: arrays[column] for column in OHLCV}, index=index)
+
+    def iter_arrays(self, symbols=None, columns=None):
+        """Yields (symbol, arrays) for every archived symbol without loading the whole panel."""
+        for symbol in symbols or self.index:
+            arrays = self.arrays(symbol, columns)
+            if arrays is not None:
+                yield symbol, arrays
+
+    def iter_histories(self, symbols=None):
+        """Yields (symbol, DataFrame) one symbol at a time."""
+        for symbol in symbols or self.index:
+            hist = self.history(symbol)
+            if hist is not None:
+                yield symbol, hist
+
+def download_histories(symbols, period=ARCHIVE_PERIOD, interval='1d'):
+    """Yields (ticker, history) for NSE symbols, one download at a time."""
+    for symbol in symbols:
+        ticker = symbol.strip().upper() + ".NS"
+        try:
+            with stage('fetch', symbol=ticker):
+                hist = yf.Ticker(ticker).history(period=period, interval=interval)
+                record_fetch(hist)
+        except Exception as e:
+            print(f"Error downloading {ticker}: {e}")
+            continue
+        yield ticker, hist
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or read the memory-mapped daily bar archive.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help=f"Download EQUITY_L.csv history into {ARCHIVE_DIR}/.")
+    build.add_argument('--symbols', nargs='+', help="NSE symbols to archive (default: all of EQUITY_L.csv).")
+    build.add_argument('--period', default=ARCHIVE_PERIOD, help="History to download per symbol.")
+    build.add_argument('--interval', default='1d', help="Bar interval (e.g. 1m, which Yahoo serves for 7 days).")
+    build.add_argument('--compress', action='store_true', help="Store one zlib block per symbol.")
+    build.add_argument('--directory', default=ARCHIVE_DIR, help="Archive directory to write.")
+    add_profiling_arguments(build)
+    show = subparsers.add_parser('show', help="Print a symbol's archived bars.")
+    show.add_argument('ticker', help="Ticker as archived (e.g. TCS.NS).")
+    show.add_argument('--rows', type=int, default=10, help="Number of most recent bars to print.")
+    show.add_argument('--directory', default=ARCHIVE_DIR, help="Archive directory to read.")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        configure_from_args(args)
+        symbols = args.symbols or pd.read_csv('EQUITY_L.csv')['SYMBOL'].tolist()
+        with stage('save'):
+            written = write_archive(download_histories(symbols, args.period, args.interval), args.directory,
+                                    args.compress)
+        print(f"Archived {written} of {len(symbols)} symbols in {args.directory}/.")
+        finish_from_args(args)
+        return
+
+    archive = BarArchive(args.directory)
+    start = time.perf_counter()
+    hist = archive.history(args.ticker.upper())
+    elapsed = time.perf_counter() - start
+    if hist is None:
+        print(f"{args.ticker.upper()} is not in {args.directory}/.")
+        return
+    print(hist.tail(args.rows))
+    print(f"{len(hist)} bars loaded in {elapsed * 1000:.3f} ms.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from instrumentation import count, record_fetch, stage
+
+BAR_STORE_DIR = "bar_store"
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+OHLCV_AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=15)  # NSE bars are aligned to the 09:15 open
+
+# Intraday intervals in minutes. 3m and 45m aren't offered by Yahoo Finance and can only be resampled.
+INTRADAY_MINUTES = {'1m': 1, '2m': 2, '3m': 3, '5m': 5, '15m': 15, '30m': 30, '45m': 45,
+                    '60m': 60, '1h': 60, '90m': 90}
+DAILY_RULES = {'1d': None, '1wk': 'W-MON', '1mo': 'MS'}
+
+# Intervals we download, finest first, with how far back Yahoo Finance serves each (in days)
+SOURCE_INTERVALS = [('1m', 7), ('5m', 59), ('15m', 59), ('1h', 729), ('1d', None)]
+
+PERIOD_DAYS = {'1d': 1, '5d': 5, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366, '2y': 731,
+               '5y': 1827, '10y': 3653, 'max': float('inf')}
+MAX_AGE = {'intraday': pd.Timedelta(minutes=5), 'daily': pd.Timedelta(hours=1)}
+# Stored with each bar: the corporate actions with ex-dates up to this time are already in its prices
+ADJUSTED_THROUGH = 'AdjustedThrough'
+
+def period_days(period):
+    if period == 'ytd':
+        today = datetime.now().date()
+        return (today - today.replace(month=1, day=1)).days + 1
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Period {period} is not supported. Valid periods: {list(PERIOD_DAYS) + ['ytd']}")
+    return PERIOD_DAYS[period]
+
+def _source_candidates(interval):
+    """Source intervals (finest first) whose bars can be aggregated into `interval`."""
+    if interval in DAILY_RULES:
+        return ['1d']
+    if interval not in INTRADAY_MINUTES:
+        raise ValueError(f"interval={interval} is not supported.")
+    minutes = INTRADAY_MINUTES[interval]
+    return [source for source, _ in SOURCE_INTERVALS
+            if source != '1d' and minutes % INTRADAY_MINUTES[source] == 0]
+
+def resample_bars(bars, interval):
+    """Aggregates finer OHLCV bars into `interval` bars (first/max/min/last/sum)."""
+    if interval in DAILY_RULES:
+        rule = DAILY_RULES[interval]
+        if rule is None:
+            return bars
+        resampled = bars[OHLCV].resample(rule, label='left', closed='left').agg(OHLCV_AGGREGATION)
+    else:
+        resampled = bars[OHLCV].resample(f"{INTRADAY_MINUTES[interval]}min", origin='start_day',
+                                         offset=SESSION_OPEN).agg(OHLCV_AGGREGATION)
+    return resampled.dropna(subset=['Open'])
+
+def slice_period(bars, period):
+    """Keeps the part of `bars` that Yahoo Finance would return for `period`.
+
+    'Nd' periods count sessions (distinct dates), like the provider does;
+    longer periods are calendar offsets back from the last bar.
+    """
+    if bars.empty or period == 'max':
+        return bars
+    if period.endswith('d'):
+        dates = bars.index.normalize()
+        sessions = dates.unique()[-int(period[:-1]):]
+        return bars[dates >= sessions[0]]
+    last = bars.index[-1]
+    if period == 'ytd':
+        start = last.normalize().replace(month=1, day=1)
+    elif period.endswith('mo'):
+        start = last - pd.DateOffset(months=int(period[:-2]))
+    else:
+        start = last - pd.DateOffset(years=int(period[:-1]))
+    return bars[bars.index >= start]
+
+class BarStore:
+    """Local store of downloaded bars, one file per ticker and source interval.
+
+    Only source intervals (1m, 5m, 15m, 1h, 1d) are downloaded; every other
+    timeframe is resampled from the finest stored bars that cover the
+    requested period, so switching timeframes on a ticker is a local
+    computation.
+    """
+
+    def __init__(self, directory=BAR_STORE_DIR):
+        self.directory = directory
+        self.meta_file = os.path.join(directory, "meta.json")
+        self.meta = {}  # "TICKER|interval" -> {'period_days': of the last fetch, 'fetched_at': str}
+        if os.path.isfile(self.meta_file):
+            with open(self.meta_file) as f:
+                self.meta = json.load(f)
+
+    def _path(self, ticker, interval):
+        return os.path.join(self.directory, f"{ticker}_{interval}.pkl")
+
+    def _save_meta(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.meta_file, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+    def _is_fresh(self, ticker, source, days):
+        entry = self.meta.get(f"{ticker}|{source}")
+        if entry is None or entry['period_days'] < days:
+            return False
+        age = pd.Timestamp.now() - pd.Timestamp(entry['fetched_at'])
+        return age <= MAX_AGE['daily' if source == '1d' else 'intraday']
+
+    def _stored(self, ticker, interval):
+        """Stored bars with their ADJUSTED_THROUGH column, or None."""
+        path = self._path(ticker, interval)
+        if not os.path.isfile(path):
+            return None
+        bars = pd.read_pickle(path)
+        if ADJUSTED_THROUGH not in bars:
+            bars[ADJUSTED_THROUGH] = pd.Timestamp.min  # Saved before this was tracked: treat as never adjusted
+        return bars
+
+    def load(self, ticker, interval):
+        bars = self._stored(ticker, interval)
+        return bars[OHLCV] if bars is not None else None
+
+    def rescale(self, ticker, ex_date, price_factor, volume_factor=1.0):
+        """Re-adjusts the stored bars before `ex_date`, in every source interval, for a corporate action.
+
+        Only bars saved before the ex-date are rescaled: bars re-fetched on or
+        after it already carry Yahoo's adjustment, since fetch() overwrites
+        the stored copy of every bar it downloads.
+
+        Returns:
+            int: Number of bars rescaled.
+        """
+        ex_date = pd.Timestamp(ex_date)
+        rescaled = 0
+        for source, _ in SOURCE_INTERVALS:
+            bars = self._stored(ticker, source)
+            if bars is None:
+                continue
+            index = bars.index.tz_localize(None) if bars.index.tz is not None else bars.index
+            stale = (index < ex_date) & (bars[ADJUSTED_THROUGH] < ex_date).to_numpy()
+            bars.loc[stale, ['Open', 'High', 'Low', 'Close']] *= price_factor
+            bars['Volume'] = np.where(stale, np.round(bars['Volume'] * volume_factor), bars['Volume']).astype(
+                bars['Volume'].dtype)
+            bars.loc[stale, ADJUSTED_THROUGH] = ex_date
+            bars.to_pickle(self._path(ticker, source))
+            rescaled += int(stale.sum())
+        return rescaled
+
+    def fetch(self, ticker, period, source):
+        """Downloads `period` of `source` bars and merges them into the stored bars."""
+        with stage('fetch', symbol=ticker, interval=source):
+            bars = yf.Ticker(ticker).history(period=period, interval=source)
+            record_fetch(bars)
+        if bars.empty:
+            return bars
+        fetched_at = datetime.now()
+        bars = bars[OHLCV].assign(**{ADJUSTED_THROUGH: pd.Timestamp(fetched_at)})
+        stored = self._stored(ticker, source)
+        if stored is not None:
+            bars = pd.concat([stored[~stored.index.isin(bars.index)], bars]).sort_index()
+        os.makedirs(self.directory, exist_ok=True)
+        bars.to_pickle(self._path(ticker, source))
+        self.meta[f"{ticker}|{source}"] = {'period_days': period_days(period),
+                                           'fetched_at': fetched_at.isoformat(timespec='seconds')}
+        self._save_meta()
+        return bars[OHLCV]
+
+    def get_bars(self, ticker, period='3mo', interval='1d'):
+        """Returns `period` of `interval` bars, from the local store when it already covers them.
+
+        Raises:
+            ValueError: If the interval or period isn't supported, or no source
+                interval can serve this period (e.g. 1m bars for more than 7 days).
+        """
+        days = period_days(period)
+        candidates = _source_candidates(interval)
+
+        for source in candidates:
+            if self._is_fresh(ticker, source, days):
+                count('cache_hits')
+                return slice_period(resample_bars(self.load(ticker, source), interval), period)
+
+        limits = dict(SOURCE_INTERVALS)
+        for source in candidates:
+            if limits[source] is None or days <= limits[source]:
+                bars = self.fetch(ticker, period, source)
+                return slice_period(resample_bars(bars, interval), period) if not bars.empty else bars
+
+        raise ValueError(f"interval={interval} is not supported for period={period}.")
+
+_default_store = None
+
+def get_bars(ticker, period='3mo', interval='1d'):
+    """get_bars() on the default on-disk BarStore."""
+    global _default_store
+    if _default_store is None:
+        _default_store = BarStore()
+    return _default_store.get_bars(ticker, period, interval)
@@ -0,0 +1,234 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from script_loader import load_script
+
+BASELINE_FILE = "benchmark_baseline.json"
+STARTUP_SCRIPTS = ['Trial24.py', 'Trial25.py', 'Trial26.py', 'Doji11.py', 'Stockinfo6.py', 'sizing_daemon.py']
+DEFAULT_TOLERANCE = 0.20  # Flag a regression when wall time grows by more than 20%
+
+def synthetic_history(seed, years, start_price=None):
+    """Builds a yfinance-shaped daily OHLCV frame from a seeded random walk."""
+    rng = np.random.default_rng(seed)
+    bars = max(int(years * 252), 2)
+    dates = pd.bdate_range(end=datetime.today().date(), periods=bars)
+    start_price = start_price or rng.uniform(20, 3000)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.018, bars)))
+    open_ = close * (1 + rng.normal(0, 0.006, bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, bars)))
+    volume = rng.integers(1_000, 5_000_000, bars)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+                        index=dates)
+
+def synthetic_universe(num_symbols, years, seed=42):
+    """Yields (symbol, history) pairs one at a time so large universes never sit in memory together."""
+    for i in range(num_symbols):
+        yield f"SYM{i:05d}", synthetic_history(seed + i, years)
+
+def offline_portfolio(prices):
+    """Returns a virtual_portfolio15.Portfolio whose prices come from a dict instead of Yahoo Finance."""
+    portfolio_module = load_script("virtual_portfolio15.py")
+
+    class OfflinePortfolio(portfolio_module.Portfolio):
+        def get_current_price(self, symbol):
+            return prices[symbol]
+
+    return OfflinePortfolio()
+
+def bench_breakout(num_symbols, years):
+    breakout = load_script("52Week_Breakout.py")
+    elapsed = 0.0
+    for symbol, hist in synthetic_universe(num_symbols, years):
+        start = time.perf_counter()
+        breakout.is_fresh_52_week_breakout(symbol, hist)
+        elapsed += time.perf_counter() - start
+    return elapsed, num_symbols
+
+def bench_golden_cross(num_symbols, years):
+    golden = load_script("Golden_crossover1.py")
+    elapsed = 0.0
+    for symbol, hist in synthetic_universe(num_symbols, years):
+        start = time.perf_counter()
+        golden.golden_cross(hist)
+        elapsed += time.perf_counter() - start
+    return elapsed, num_symbols
+
+def bench_doji(num_symbols, years):
+    doji = load_script("Doji11.py")
+    elapsed = 0.0
+    for symbol, hist in synthetic_universe(num_symbols, years):
+        start = time.perf_counter()
+        doji.detect_doji_candles(hist)
+        elapsed += time.perf_counter() - start
+    return elapsed, num_symbols
+
+def bench_position_size(num_symbols, years):
+    sizing = load_script("Trial26.py")
+    rng = np.random.default_rng(7)
+    calls = num_symbols * 100
+    cmps = rng.uniform(20, 3000, calls).tolist()
+    changes = rng.uniform(0, 4, calls).tolist()
+    start = time.perf_counter()
+    for cmp, change_percent in zip(cmps, changes):
+        sizing.calculate_position_size(1445000, cmp, change_percent)
+    return time.perf_counter() - start, calls
+
+def bench_print_portfolio(num_symbols, years):
+    rng = np.random.default_rng(11)
+    symbols = [f"SYM{i:05d}" for i in range(num_symbols)]
+    prices = dict(zip(symbols, rng.uniform(20, 3000, num_symbols).round(2)))
+    portfolio = offline_portfolio(prices)
+    portfolio.cash = 1e12  # Enough to hold the whole synthetic universe
+    for symbol in symbols:
+        portfolio.buy_stock(symbol, int(rng.integers(1, 500)), "2024-01-01 09:15:00")
+    start = time.perf_counter()
+    portfolio.print_portfolio()
+    return time.perf_counter() - start, 1
+
+BENCHMARKS = {
+    'is_fresh_52_week_breakout': bench_breakout,
+    'golden_cross': bench_golden_cross,
+    'detect_doji_candles': bench_doji,
+    'calculate_position_size': bench_position_size,
+    'Portfolio.print_portfolio': bench_print_portfolio,
+}
+
+def run_benchmark(name, num_symbols, years):
+    """Runs one benchmark twice: once for wall time, once under tracemalloc for peak memory."""
+    func = BENCHMARKS[name]
+    with contextlib.redirect_stdout(io.StringIO()):
+        wall_time, calls = func(num_symbols, years)
+        tracemalloc.start()
+        func(num_symbols, years)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'benchmark': name,
+        'symbols': num_symbols,
+        'years': years,
+        'calls': calls,
+        'wall_time_s': round(wall_time, 6),
+        'peak_memory_mb': round(peak / 1e6, 3),
+        'calls_per_second': round(calls / wall_time, 2) if wall_time > 0 else None,
+    }
+
+def run_startup_benchmark(filename, runs=5):
+    """Median wall time of importing a script in a fresh interpreter, i.e. its startup cost before main()."""
+    code = f"from script_loader import load_script; load_script({filename!r})"
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    wall_time = statistics.median(times)
+    return {
+        'benchmark': f"startup:{filename}",
+        'symbols': 0,
+        'years': 0,
+        'calls': runs,
+        'wall_time_s': round(wall_time, 6),
+        'peak_memory_mb': None,
+        'calls_per_second': round(1 / wall_time, 2),
+    }
+
+def result_key(result):
+    return f"{result['benchmark']}|{result['symbols']}|{result['years']}"
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Marks each result with its baseline wall time and whether it regressed beyond the tolerance."""
+    regressions = []
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None:
+            result['baseline_wall_time_s'] = None
+            result['regression'] = False
+            continue
+        result['baseline_wall_time_s'] = previous['wall_time_s']
+        result['regression'] = result['wall_time_s'] > previous['wall_time_s'] * (1 + tolerance)
+        if result['regression']:
+            regressions.append(result)
+    return regressions
+
+def load_baseline(filename=BASELINE_FILE):
+    if not os.path.isfile(filename):
+        return {}
+    with open(filename) as f:
+        return json.load(f)
+
+def save_baseline(results, filename=BASELINE_FILE):
+    baseline = load_baseline(filename)
+    for result in results:
+        baseline[result_key(result)] = {k: result[k] for k in ('wall_time_s', 'peak_memory_mb', 'calls_per_second')}
+    with open(filename, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+    print(f"Baseline saved to {filename}.", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the screeners, sizing and portfolio code.")
+    parser.add_argument('--symbols', type=int, nargs='+', default=[100],
+                        help="Universe sizes to run (e.g. 100 1000 5000).")
+    parser.add_argument('--years', type=int, nargs='+', default=[1],
+                        help="Years of daily bars per symbol (1-10).")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help="Run only these benchmarks.")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline JSON file to compare against.")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown before flagging a regression (0.2 = 20%%).")
+    parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+    parser.add_argument('--startup', action='store_true',
+                        help="Measure the import time of the interactive scripts instead of the benchmarks.")
+    args = parser.parse_args()
+
+    for years in args.years:
+        if not 1 <= years <= 10:
+            parser.error("--years must be between 1 and 10")
+
+    results = []
+    for filename in STARTUP_SCRIPTS if args.startup else []:
+        print(f"Running startup:{filename}...", file=sys.stderr)
+        results.append(run_startup_benchmark(filename))
+    for name in [] if args.startup else args.only or BENCHMARKS:
+        for num_symbols in args.symbols:
+            for years in args.years:
+                print(f"Running {name} ({num_symbols} symbols, {years}y)...", file=sys.stderr)
+                results.append(run_benchmark(name, num_symbols, years))
+
+    regressions = compare_to_baseline(results, load_baseline(args.baseline), args.tolerance)
+    report = {
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'tolerance': args.tolerance,
+        'results': results,
+        'regressions': [result_key(r) for r in regressions],
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.output}.", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed beyond {args.tolerance:.0%}.", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
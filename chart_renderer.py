@@ -0,0 +1,160 @@
+import argparse
+import glob
+import hashlib
+import os
+import re
+
+import matplotlib.pyplot as plt
+import mplfinance as mpf
+import numpy as np
+import pandas as pd
+
+from bar_store import get_bars
+from instrumentation import count, stage
+from results_store import ResultsStore
+
+CHART_CACHE_DIR = "chart_cache"
+WIDTH_PX = 1200
+HEIGHT_PX = 700
+DPI = 100
+PX_PER_CANDLE = 3  # Narrower candles than this are just noise on screen
+
+def downsample_ohlc(bars, max_candles):
+    """Aggregates consecutive bars into at most `max_candles` OHLC-preserving buckets.
+
+    Each bucket keeps its first Open, highest High, lowest Low, last Close and
+    total Volume, and is stamped with the date of its first bar.
+    """
+    if len(bars) <= max_candles:
+        return bars
+    bucket_size = -(-len(bars) // max_candles)
+    starts = np.arange(0, len(bars), bucket_size)
+    ends = np.minimum(starts + bucket_size, len(bars)) - 1
+    downsampled = pd.DataFrame({
+        'Open': bars['Open'].to_numpy()[starts],
+        'High': np.maximum.reduceat(bars['High'].to_numpy(), starts),
+        'Low': np.minimum.reduceat(bars['Low'].to_numpy(), starts),
+        'Close': bars['Close'].to_numpy()[ends],
+    }, index=bars.index[starts])
+    if 'Volume' in bars:
+        downsampled['Volume'] = np.add.reduceat(bars['Volume'].to_numpy(), starts)
+    return downsampled
+
+def _chart_prefix(ticker, period, interval):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', f"{ticker}_{period}_{interval}")
+
+def chart_cache_path(ticker, period, interval, bars, cache_dir=CHART_CACHE_DIR):
+    """Cache file for a chart of `bars`.
+
+    The name carries the last bar's time and a digest of the bar count, the
+    first bar's time and the last bar's values, so a new bar or a still
+    forming bar that has moved gets a new file.
+    """
+    stamp = pd.Timestamp(bars.index[-1]).strftime('%Y%m%d%H%M')
+    digest = hashlib.sha1(f"{len(bars)}|{bars.index[0]}".encode())
+    digest.update(bars.iloc[-1].to_numpy(dtype=float).tobytes())
+    return os.path.join(cache_dir, f"{_chart_prefix(ticker, period, interval)}_{stamp}_{digest.hexdigest()[:8]}.png")
+
+def prune_chart_cache(path, ticker, period, interval, cache_dir=CHART_CACHE_DIR):
+    """Deletes the older cached versions of a chart, keeping `path`."""
+    pattern = f"{glob.escape(_chart_prefix(ticker, period, interval))}_*.png"
+    for old_path in glob.glob(os.path.join(glob.escape(cache_dir), pattern)):
+        if old_path != path:
+            os.remove(old_path)
+
+def render_chart(ticker, bars, period='3mo', interval='1d', show=False, cache_dir=CHART_CACHE_DIR,
+                 width_px=WIDTH_PX, height_px=HEIGHT_PX):
+    """Renders a candlestick chart to a cached PNG, downsampled to the pixel budget first.
+
+    Args:
+        ticker (str): Symbol used for the title and cache key.
+        bars (DataFrame): OHLCV bars (e.g. from bar_store.get_bars).
+        period (str), interval (str): Part of the cache key.
+        show (bool): Also display the chart in a window.
+        width_px (int), height_px (int): Output size; the candle budget is width_px / PX_PER_CANDLE.
+
+    Returns:
+        str: Path of the PNG file, or None if there were no bars.
+    """
+    if bars.empty:
+        print(f"No data found for {ticker}.")
+        return None
+
+    path = chart_cache_path(ticker, period, interval, bars, cache_dir)
+    if os.path.isfile(path):
+        count('cache_hits')
+        if show:
+            _show_image(path, ticker)
+        return path
+
+    with stage('plot', symbol=ticker):
+        plot_bars = downsample_ohlc(bars, max(width_px // PX_PER_CANDLE, 1))
+        if plot_bars.index.tz is not None:
+            plot_bars = plot_bars.tz_localize(None)
+        fig, _ = mpf.plot(plot_bars, type='candle', style='charles', volume='Volume' in plot_bars,
+                          title=ticker, figsize=(width_px / DPI, height_px / DPI),
+                          warn_too_much_data=len(plot_bars) + 1, returnfig=True)
+        os.makedirs(cache_dir, exist_ok=True)
+        fig.savefig(path, dpi=DPI)
+        prune_chart_cache(path, ticker, period, interval, cache_dir)
+        if show:
+            plt.show()
+        plt.close(fig)
+    return path
+
+def _show_image(path, title):
+    fig = plt.figure(figsize=(WIDTH_PX / DPI, HEIGHT_PX / DPI))
+    plt.imshow(plt.imread(path))
+    plt.axis('off')
+    fig.canvas.manager.set_window_title(title)
+    plt.show()
+
+def export_charts(tickers, period='3mo', interval='1d', out_dir=CHART_CACHE_DIR):
+    """Renders charts for many tickers without opening any windows.
+
+    Returns:
+        dict: ticker -> PNG path (None for tickers without data).
+    """
+    plt.switch_backend('Agg')
+    paths = {}
+    for ticker in tickers:
+        try:
+            bars = get_bars(ticker, period, interval)
+        except Exception as e:
+            print(f"Error fetching data for {ticker}: {e}")
+            paths[ticker] = None
+            continue
+        paths[ticker] = render_chart(ticker, bars, period, interval, cache_dir=out_dir)
+        if paths[ticker]:
+            print(f"Saved chart for {ticker} to {paths[ticker]}")
+    return paths
+
+def new_hit_tickers(consumer='charts', rules=None):
+    """Tickers of the screener hits `consumer` hasn't charted yet, marking them seen in the results store."""
+    store = ResultsStore()
+    try:
+        frames = [store.changes(consumer, rule) for rule in rules or store.rules()]
+    finally:
+        store.close()
+    return list(dict.fromkeys(symbol for frame in frames for symbol in frame['Symbol']))
+
+def main():
+    parser = argparse.ArgumentParser(description="Export candlestick charts as PNG files without opening windows.")
+    parser.add_argument('tickers', nargs='*', help="Ticker symbols (e.g. TCS.NS INFY.NS).")
+    parser.add_argument('--new-hits', action='store_true',
+                        help="Also chart the screener hits added since the last --new-hits run (see results_store.py).")
+    parser.add_argument('--rules', nargs='+', help="Rules to take new hits from (default: all rules).")
+    parser.add_argument('--period', default='3mo')
+    parser.add_argument('--interval', default='1d')
+    parser.add_argument('--out-dir', default=CHART_CACHE_DIR)
+    args = parser.parse_args()
+    tickers = [t.upper() for t in args.tickers]
+    if args.new_hits:
+        tickers += new_hit_tickers(rules=args.rules)
+    if not tickers:
+        print("No tickers to chart.")
+        return
+    export_charts(list(dict.fromkeys(tickers)), args.period, args.interval, args.out_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from bar_archive import ARCHIVE_DIR, BarArchive
+from instrumentation import add_profiling_arguments, configure_from_args, finish_from_args, stage
+
+MEMORY_BUDGET_MB = 256
+WORKING_COPIES = 4  # Temporaries a rule makes per loaded value (rolling sums, masks, shifted copies)
+BREAKOUT_WINDOW = 252
+SHORT_WINDOW, LONG_WINDOW = 50, 200
+CROSS_LOOKBACK = 7  # Bars at the end of each history searched for a golden cross
+
+def chunk_capacity(memory_budget_mb, bytes_per_item):
+    """How many items (symbols or rows) of `bytes_per_item` fit in the budget, at least one."""
+    return max(int(memory_budget_mb * 2 ** 20 // (bytes_per_item * WORKING_COPIES)), 1)
+
+def symbol_chunks(archive, columns, tail, symbols=None, memory_budget_mb=MEMORY_BUDGET_MB):
+    """Yields (symbols, panel) for groups of symbols sized to the memory budget.
+
+    The panel maps each column to a (tail, symbols) float64 array of the last
+    `tail` bars of every symbol in the chunk, aligned on the most recent bar
+    and NaN-padded above shorter histories. 'Date' comes back as
+    datetime64[ns] with NaT padding. Only the tails are read from the archive.
+    """
+    symbols = [s for s in (symbols or archive.symbols()) if s in archive]
+    per_chunk = chunk_capacity(memory_budget_mb, tail * len(columns) * 8)
+    for first in range(0, len(symbols), per_chunk):
+        chunk = symbols[first:first + per_chunk]
+        with stage('load', symbols=len(chunk)):
+            panel = {column: np.full((tail, len(chunk)), np.datetime64('NaT', 'ns') if column == 'Date' else np.nan,
+                                     dtype='datetime64[ns]' if column == 'Date' else float)
+                     for column in columns}
+            for j, symbol in enumerate(chunk):
+                arrays = archive.arrays(symbol, columns)
+                for column in columns:
+                    values = arrays[column][-tail:]
+                    panel[column][tail - len(values):, j] = (values.view('datetime64[ns]') if column == 'Date'
+                                                             else values)
+        yield chunk, panel
+
+def date_chunks(archive, symbol, columns, overlap=0, memory_budget_mb=MEMORY_BUDGET_MB):
+    """Yields (skip, arrays) over one symbol's full history in row chunks sized to the memory budget.
+
+    Each chunk also carries up to `overlap` rows from before it, so windowed
+    calculations are exact at chunk boundaries; the first `skip` rows are
+    that overlap and their results belong to the previous chunk. With an
+    uncompressed archive the arrays are memory-mapped slices, not copies.
+    """
+    arrays = archive.arrays(symbol, columns)
+    rows = archive.rows(symbol)
+    step = chunk_capacity(memory_budget_mb, len(columns) * 8)
+    for start in range(0, rows, step):
+        begin = max(start - overlap, 0)
+        yield start - begin, {column: values[begin:start + step] for column, values in arrays.items()}
+
+def rolling_mean(values, window):
+    """Rolling mean down the rows of a 2-D array, ignoring NaNs (like pandas' min_periods=1)."""
+    valid = ~np.isnan(values)
+    sums = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(np.where(valid, values, 0), axis=0)])
+    counts = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(valid, axis=0)])
+    lagged = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (sums[1:] - sums[lagged]) / (counts[1:] - counts[lagged])
+    return np.where(valid, means, np.nan)
+
+def breakout_rule(symbols, panel, window=BREAKOUT_WINDOW):
+    """52Week_Breakout.py's check on a chunk: the last High above the highest High of the `window` bars before it."""
+    highs = panel['High']
+    previous_high = np.fmax.reduce(highs[-window - 1:-1], axis=0)
+    hits = highs[-1] > previous_high
+    return pd.DataFrame({'Symbol': np.array(symbols)[hits], 'Date': panel['Date'][-1][hits],
+                         'High': highs[-1][hits], 'Previous_High': previous_high[hits]})
+
+def golden_cross_rule(symbols, panel, short_window=SHORT_WINDOW, long_window=LONG_WINDOW,
+                      lookback=CROSS_LOOKBACK):
+    """Golden_crossover1.py's check on a chunk: the short MA crossing above the long MA in the last `lookback` bars."""
+    short_ma = rolling_mean(panel['Close'], short_window)
+    long_ma = rolling_mean(panel['Close'], long_window)
+    above = short_ma > long_ma
+    crosses = above[1:] & (short_ma[:-1] <= long_ma[:-1])
+    rows, columns = np.nonzero(crosses[-lookback:])
+    rows = rows + len(above) - lookback
+    return pd.DataFrame({'Symbol': np.array(symbols)[columns], 'Date': panel['Date'][rows, columns],
+                         'Close': panel['Close'][rows, columns], 'Short_MA': short_ma[rows, columns],
+                         'Long_MA': long_ma[rows, columns]})
+
+RULES = {
+    'breakout': (breakout_rule, ['Date', 'High'], BREAKOUT_WINDOW + 1),
+    'golden_cross': (golden_cross_rule, ['Date', 'Close'], LONG_WINDOW + CROSS_LOOKBACK + 1),
+}
+
+def scan(archive, rule, symbols=None, memory_budget_mb=MEMORY_BUDGET_MB):
+    """Runs one of RULES over the archive chunk by chunk and merges the hits."""
+    function, columns, tail = RULES[rule]
+    results = []
+    for chunk, panel in symbol_chunks(archive, columns, tail, symbols, memory_budget_mb):
+        with stage('compute', symbols=len(chunk)):
+            results.append(function(chunk, panel))
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+def breakout_events(archive, symbol, window=BREAKOUT_WINDOW, memory_budget_mb=MEMORY_BUDGET_MB):
+    """Every bar in a symbol's full history whose High beat the `window` bars before it, in date chunks."""
+    events = []
+    for skip, arrays in date_chunks(archive, symbol, ['Date', 'High'], window, memory_budget_mb):
+        highs = pd.Series(arrays['High'], dtype=float)
+        previous_high = highs.rolling(window, min_periods=1).max().shift(1)
+        hits = (highs > previous_high).to_numpy()[skip:]
+        events.append(arrays['Date'][skip:][hits].view('datetime64[ns]'))
+    return np.concatenate(events) if events else np.array([], dtype='datetime64[ns]')
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the breakout or golden-cross scan over an archive in chunks.")
+    parser.add_argument('rule', choices=list(RULES))
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help="Archive directory written by bar_archive.py.")
+    parser.add_argument('--memory-mb', type=float, default=MEMORY_BUDGET_MB,
+                        help="Memory budget for the loaded chunk and its working copies.")
+    parser.add_argument('--output', help="CSV file for the hits (default: <rule>_chunked_results.csv).")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    archive = BarArchive(args.archive)
+    results = scan(archive, args.rule, memory_budget_mb=args.memory_mb)
+    output = args.output or f"{args.rule}_chunked_results.csv"
+    if results.empty:
+        print(f"No {args.rule} hits in {len(archive)} symbols.")
+    else:
+        with stage('save'):
+            results.to_csv(output, index=False)
+        print(f"{len(results)} {args.rule} hits in {len(archive)} symbols saved to {output}.")
+    finish_from_args(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import count
+from trading_calendar import default_calendar
+
+QUARANTINE_FILE = "data_quality_quarantine.csv"
+MAX_JUMP = 0.4  # Close-to-close moves beyond 40% are suspect (NSE price bands top out at 20%)
+PRICE_TOLERANCE = 1e-6  # Relative slack for OHLC ordering, since adjusted prices carry rounding
+# Rows failing any of these are dropped (quarantined); the other checks are only reported
+QUARANTINE_CHECKS = ['nan_prices', 'non_positive', 'ohlc_inconsistent']
+CHECKS = QUARANTINE_CHECKS + ['zero_volume', 'missing_sessions', 'outlier_jumps']
+QUARANTINE_COLUMNS = ['Script', 'Symbol', 'Dates', 'Issues', 'CheckedAt']
+
+def row_issues(bars, max_jump=MAX_JUMP):
+    """Per-row boolean masks for every check except missing_sessions, all vectorized.
+
+    outlier_jumps flags the bar after the jump.
+    """
+    prices = bars[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=float)
+    open_, high, low, close = prices.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        masks = {
+            'nan_prices': np.isnan(prices).any(axis=1),
+            'non_positive': (prices <= 0).any(axis=1),
+            'ohlc_inconsistent': ((high < np.fmax(open_, close) * (1 - PRICE_TOLERANCE))
+                                  | (low > np.fmin(open_, close) * (1 + PRICE_TOLERANCE)) | (high < low)),
+            'outlier_jumps': np.r_[False, np.abs(np.diff(close) / close[:-1]) > max_jump],
+        }
+    if 'Volume' in bars:
+        masks['zero_volume'] = bars['Volume'].to_numpy(dtype=float) <= 0
+    return masks
+
+def missing_sessions(bars, calendar=None):
+    """Sessions between the first and last bar that have no bar, within the years nse_holidays.csv covers."""
+    index = bars.index.tz_localize(None) if bars.index.tz is not None else bars.index
+    dates = index.values.astype('datetime64[D]')
+    dates = dates[np.r_[True, dates[1:] != dates[:-1]]]  # Bars are in time order, so this is unique()
+    calendar = calendar or default_calendar()
+    dates = dates[(dates >= calendar.holidays_from) & (dates <= calendar.holidays_until)]  # Only years with holiday data
+    if not len(dates):
+        return 0
+    sessions = calendar.sessions
+    first, last = np.searchsorted(sessions, dates[0]), np.searchsorted(sessions, dates[-1], side='right')
+    positions = np.searchsorted(sessions, dates).clip(max=len(sessions) - 1)
+    return int(max(last - first - (sessions[positions] == dates).sum(), 0))
+
+def validate(bars, calendar=None, max_jump=MAX_JUMP):
+    """Counts the rows of a yfinance-shaped OHLCV frame that fail each check.
+
+    Returns:
+        dict: check -> number of offending rows (for missing_sessions, the
+        number of missing sessions), only for checks that found something.
+    """
+    if bars is None or bars.empty:
+        return {}
+    issues = {check: mask.sum() for check, mask in row_issues(bars, max_jump).items()}
+    issues['missing_sessions'] = missing_sessions(bars, calendar)
+    return {check: int(n) for check, n in issues.items() if n}
+
+class DataQuality:
+    """Validates fetched bars, drops bad rows, and keeps per-check totals and the quarantined rows for the run."""
+
+    def __init__(self, calendar=None):
+        self.calendar = calendar
+        self.checked = 0
+        self.totals = dict.fromkeys(CHECKS, 0)  # check -> symbols it flagged
+        self.quarantined = {}  # symbol -> (issues, dates of the dropped rows)
+
+    def check(self, symbol, bars):
+        """Validates one symbol's bars and drops the rows that fail a quarantine check.
+
+        A dividend-only row with NaN prices costs that row, not the symbol.
+
+        Returns:
+            DataFrame: The bars without the quarantined rows (the same frame if
+            none were dropped), or None if no rows are left.
+        """
+        if bars is None or bars.empty:
+            return bars
+        self.checked += 1
+        masks = row_issues(bars)
+        issues = {name: int(mask.sum()) for name, mask in masks.items()}
+        issues['missing_sessions'] = missing_sessions(bars, self.calendar)
+        issues = {name: n for name, n in issues.items() if n}
+        for name in issues:
+            self.totals[name] += 1
+            count(f"dq_{name}")
+        bad = np.logical_or.reduce([masks[name] for name in QUARANTINE_CHECKS])
+        if not bad.any():
+            return bars
+        self.quarantined[symbol] = (issues, bars.index[bad])
+        count('quarantined_rows', int(bad.sum()))
+        bars = bars[~bad].copy()
+        return bars if not bars.empty else None
+
+    def report(self, filename=QUARANTINE_FILE, script=None):
+        """Prints the run's totals and rewrites this script's rows of the quarantine CSV.
+
+        Rows from other scripts are kept, so the file lists each screener's latest run once.
+        """
+        script = script or os.path.basename(sys.argv[0])
+        flagged = {name: n for name, n in self.totals.items() if n}
+        if flagged:
+            dropped = sum(len(dates) for _, dates in self.quarantined.values())
+            print(f"\nData quality: {self.checked} symbols checked, {dropped} rows quarantined "
+                  f"from {len(self.quarantined)} symbols.")
+            for name, n in flagged.items():
+                print(f"  {name}: {n} symbols{' (rows dropped)' if name in QUARANTINE_CHECKS else ''}")
+
+        previous = pd.read_csv(filename) if os.path.isfile(filename) else pd.DataFrame(columns=QUARANTINE_COLUMNS)
+        if 'Script' not in previous:
+            previous = pd.DataFrame(columns=QUARANTINE_COLUMNS)  # Appended before rows were tagged by script
+        kept = previous[previous['Script'] != script]
+        rows = [{'Script': script, 'Symbol': symbol, 'Dates': " ".join(f"{date:%Y-%m-%d}" for date in dates),
+                 'Issues': "; ".join(f"{k}={v}" for k, v in issues.items()),
+                 'CheckedAt': datetime.now().strftime('%Y-%m-%d %H:%M')}
+                for symbol, (issues, dates) in self.quarantined.items()]
+        if not rows and len(kept) == len(previous):
+            return  # Nothing of this script's to add or remove
+        frames = [frame for frame in (kept, pd.DataFrame(rows, columns=QUARANTINE_COLUMNS)) if len(frame)]
+        table = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=QUARANTINE_COLUMNS)
+        tmp_file = filename + ".tmp"
+        table.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, filename)
+        if rows:
+            print(f"  Quarantined rows listed in {filename}.")
+
+_quality = DataQuality()
+
+def clean_bars(symbol, bars):
+    """check() on the run-wide DataQuality."""
+    return _quality.check(symbol, bars)
+
+def report_quality(filename=QUARANTINE_FILE):
+    """report() on the run-wide DataQuality."""
+    _quality.report(filename)
@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from bar_store import PERIOD_DAYS, get_bars
+from data_quality import clean_bars, report_quality
+from instrumentation import add_profiling_arguments, configure_from_args, count, finish_from_args, stage
+from rolling_extremes import completed_bars
+from trading_calendar import default_calendar
+from volatility import ATR_PERIOD, true_range, wilder_smooth
+
+FEATURE_STORE_DIR = "feature_store"
+EMA_SPANS = [5, 7, 9, 12, 15, 18, 21, 50, 100, 200]
+SMA_WINDOWS = [50, 200]
+WINDOW_52_WEEKS = 252
+HISTORY_ROWS = 504  # Two years of sessions are kept per symbol
+RAW = ['Open', 'High', 'Low', 'Close', 'Volume']
+COLUMNS = (RAW + ['Pct_Change'] + [f"EMA_{span}" for span in EMA_SPANS] + [f"SMA_{w}" for w in SMA_WINDOWS]
+           + ['High_52W', 'Low_52W', f"ATR_{ATR_PERIOD}"])
+COLUMN_INDEX = {name: i for i, name in enumerate(COLUMNS)}
+# Columns in price units, which a split or dividend scales; Pct_Change is a ratio and Volume scales on its own
+PRICE_COLUMNS = [COLUMN_INDEX[name] for name in COLUMNS if name not in ('Volume', 'Pct_Change')]
+
+def compute_features(bars, previous=None):
+    """Computes the feature rows for `bars`, continuing from the rows already stored.
+
+    Args:
+        bars (DataFrame): New daily OHLCV bars, oldest first.
+        previous (ndarray): Stored rows for the same symbol (at least the last
+            WINDOW_52_WEEKS of them), or None when starting from scratch.
+
+    Returns:
+        ndarray: One row of COLUMNS per bar in `bars`.
+    """
+    new = bars[RAW].to_numpy(dtype=float)
+    k = len(new)
+    rows = np.empty((k, len(COLUMNS)))
+    rows[:, :len(RAW)] = new
+    has_previous = previous is not None and len(previous)
+    tail = previous[-WINDOW_52_WEEKS:, :len(RAW)] if has_previous else np.empty((0, len(RAW)))
+    raw = pd.DataFrame(np.vstack([tail, new]), columns=RAW)
+
+    # Rolling windows over the stored tail plus the new bars
+    for w in SMA_WINDOWS:
+        rows[:, COLUMN_INDEX[f"SMA_{w}"]] = raw['Close'].rolling(w, min_periods=1).mean().to_numpy()[-k:]
+    rows[:, COLUMN_INDEX['High_52W']] = raw['High'].rolling(WINDOW_52_WEEKS, min_periods=1).max().to_numpy()[-k:]
+    rows[:, COLUMN_INDEX['Low_52W']] = raw['Low'].rolling(WINDOW_52_WEEKS, min_periods=1).min().to_numpy()[-k:]
+
+    closes = raw['Close'].to_numpy()
+    previous_closes = closes[-k - 1:-1] if len(closes) > k else np.concatenate([[np.nan], closes[:-1]])
+    rows[:, COLUMN_INDEX['Pct_Change']] = (new[:, 3] - previous_closes) / previous_closes * 100
+
+    # EMAs (adjust=False) and Wilder's ATR are recursive, so they carry on from the last stored row
+    ema_columns = [COLUMN_INDEX[f"EMA_{span}"] for span in EMA_SPANS]
+    alphas = np.array([2 / (span + 1) for span in EMA_SPANS])
+    state = previous[-1, ema_columns] if has_previous else np.repeat(new[0, 3], len(EMA_SPANS))
+    for i in range(k):
+        state = state + alphas * (new[i, 3] - state)
+        rows[i, ema_columns] = state
+    ranges = true_range(raw['High'], raw['Low'], raw['Close'])[-k:]
+    atr_column = COLUMN_INDEX[f"ATR_{ATR_PERIOD}"]
+    if has_previous:
+        # The stored ATR seeds Wilder's smoothing, which continues with the new ranges
+        ranges = np.concatenate([previous[-1:, atr_column], ranges])
+    rows[:, atr_column] = wilder_smooth(ranges[:, None], ATR_PERIOD)[-k:, 0]
+    return rows
+
+class FeatureStore:
+    """Per-symbol indicator arrays saved with np.save and read back memory-mapped.
+
+    Each symbol has <TICKER>.npy (rows of COLUMNS, oldest first) and
+    <TICKER>_dates.npy. latest.npy holds the last row of every symbol, so
+    the values needed at the open for the whole universe are one mmap read.
+    """
+
+    def __init__(self, directory=FEATURE_STORE_DIR):
+        self.directory = directory
+
+    def _path(self, ticker, suffix=""):
+        return os.path.join(self.directory, f"{ticker}{suffix}.npy")
+
+    def _save(self, path, array):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_file = path[:-4] + ".tmp.npy"
+        np.save(tmp_file, array)
+        os.replace(tmp_file, path)  # Readers holding the old mmap keep a valid file
+
+    def tickers(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.directory)
+                      if name.endswith(".npy") and not name.endswith(("_dates.npy", ".tmp.npy"))
+                      and name != "latest.npy")
+
+    def arrays(self, ticker):
+        """Memory-mapped (rows, dates) for a ticker, or (None, None) if it isn't stored."""
+        if not os.path.isfile(self._path(ticker)):
+            return None, None
+        return np.load(self._path(ticker), mmap_mode='r'), np.load(self._path(ticker, "_dates"), mmap_mode='r')
+
+    def features(self, ticker, columns=None):
+        """Stored indicator history for a ticker as a DataFrame indexed by date (empty if unknown)."""
+        rows, dates = self.arrays(ticker)
+        if rows is None:
+            return pd.DataFrame(columns=columns or COLUMNS)
+        frame = pd.DataFrame(rows, index=pd.DatetimeIndex(dates, name='Date'), columns=COLUMNS, copy=False)
+        return frame[columns] if columns else frame
+
+    def last_date(self, ticker):
+        _, dates = self.arrays(ticker)
+        return pd.Timestamp(dates[-1]) if dates is not None and len(dates) else None
+
+    def update(self, ticker, bars):
+        """Appends the features of every bar newer than the ticker's last stored date.
+
+        Returns:
+            int: Number of new rows.
+        """
+        rows, dates = self.arrays(ticker)
+        index = bars.index.tz_localize(None) if bars.index.tz is not None else bars.index
+        index = index.normalize()
+        if dates is not None and len(dates):
+            bars, index = bars[index > dates[-1]], index[index > dates[-1]]
+        if bars.empty:
+            return 0
+        with stage('compute', symbol=ticker):
+            new_rows = compute_features(bars, rows)
+        if rows is not None:
+            new_rows = np.vstack([rows, new_rows])
+            index = np.concatenate([dates, index.to_numpy(dtype='datetime64[ns]')])
+        self._save(self._path(ticker), new_rows[-HISTORY_ROWS:])
+        self._save(self._path(ticker, "_dates"), np.asarray(index, dtype='datetime64[ns]')[-HISTORY_ROWS:])
+        return len(bars)
+
+    def rescale(self, ticker, ex_date, price_factor, volume_factor=1.0):
+        """Re-adjusts a ticker's stored rows for a corporate action instead of rebuilding them.
+
+        Rows before `ex_date` have their price columns (bars, EMAs, SMAs,
+        52-week levels, ATR) multiplied by `price_factor` and their volume by
+        `volume_factor`. Rows from the ex-date on, already in the new scale,
+        are recomputed from their own bars on top of the rescaled ones.
+
+        Returns:
+            int: Number of rows rescaled.
+        """
+        rows, dates = self.arrays(ticker)
+        if rows is None:
+            return 0
+        rows = np.array(rows)  # Writable copy of the mmap
+        k = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(ex_date), 'ns')))
+        rows[:k, PRICE_COLUMNS] *= price_factor
+        rows[:k, COLUMN_INDEX['Volume']] *= volume_factor
+        if 0 < k < len(rows):
+            rows[k:] = compute_features(pd.DataFrame(rows[k:, :len(RAW)], columns=RAW), rows[:k])
+        self._save(self._path(ticker), rows)
+        return k
+
+    def refresh(self, ticker):
+        """Brings a ticker up to date from the local bar store with completed sessions only."""
+        last_date = self.last_date(ticker)
+        if last_date is None:
+            period = '2y'
+        elif last_date >= default_calendar().last_completed_session():
+            count('cache_hits')  # Already has the latest completed session
+            return 0
+        else:
+            gap = (pd.Timestamp.now().normalize() - last_date).days + 1
+            period = next((p for p, days in PERIOD_DAYS.items() if days >= gap), 'max')
+        bars = clean_bars(ticker, completed_bars(get_bars(ticker, period, '1d')))
+        if bars is None:
+            return 0
+        return self.update(ticker, bars)
+
+    def write_latest(self, tickers=None):
+        """Collects the last row of every stored ticker into latest.npy."""
+        tickers = [t for t in (tickers or self.tickers()) if os.path.isfile(self._path(t))]
+        latest = np.full((len(tickers), len(COLUMNS)), np.nan)
+        latest_dates = np.empty(len(tickers), dtype='datetime64[ns]')
+        for i, ticker in enumerate(tickers):
+            rows, dates = self.arrays(ticker)
+            latest[i], latest_dates[i] = rows[-1], dates[-1]
+        self._save(self._path("latest"), latest)
+        self._save(self._path("latest", "_dates"), latest_dates)
+        with open(os.path.join(self.directory, "latest.json"), 'w') as f:
+            json.dump(tickers, f)
+
+    def latest(self, columns=None):
+        """Last stored row of every ticker as a DataFrame indexed by ticker, read from latest.npy."""
+        if not os.path.isfile(self._path("latest")):
+            return pd.DataFrame(columns=['Date'] + (columns or COLUMNS))
+        count('cache_hits')
+        with open(os.path.join(self.directory, "latest.json")) as f:
+            tickers = json.load(f)
+        frame = pd.DataFrame(np.load(self._path("latest"), mmap_mode='r'), index=pd.Index(tickers, name='Ticker'),
+                             columns=COLUMNS)
+        frame.insert(0, 'Date', np.load(self._path("latest", "_dates")))
+        return frame[['Date'] + columns] if columns else frame
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the indicator feature store for EQUITY_L.csv.")
+    parser.add_argument('--symbols', nargs='+', help="NSE symbols to update (default: all of EQUITY_L.csv).")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    symbols = args.symbols or pd.read_csv('EQUITY_L.csv')['SYMBOL'].tolist()
+    store = FeatureStore()
+    for symbol in symbols:
+        try:
+            store.refresh(symbol.strip().upper() + ".NS")
+        except Exception as e:
+            print(f"Error updating {symbol}: {e}")
+    with stage('save'):
+        store.write_latest()
+    print(f"Features for {len(store.tickers())} symbols saved to {FEATURE_STORE_DIR}/.")
+    report_quality()
+    finish_from_args(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+import yfinance as yf
+
+from instrumentation import count, stage
+
+FUNDAMENTALS_CACHE_FILE = "fundamentals_cache.json"
+DEFAULT_TTL_DAYS = 120  # Fundamentals only change when quarterly results come out
+REPORTING_LAG_DAYS = 60  # Listed companies publish results within 45 (quarterly) to 60 (annual) days
+INFO_FIELDS = ('marketCap', 'sector', 'industry', 'trailingPE')
+UNKNOWN_PERIOD = 'N/A'
+
+def reporting_period(financials):
+    """Returns the quarter label (e.g. '2024Q3') of the latest period reported in `financials`.
+
+    Returns UNKNOWN_PERIOD when there are no dated statements.
+    """
+    if financials is None or financials.empty:
+        return UNKNOWN_PERIOD
+    dates = [date for date in financials.columns if hasattr(date, 'strftime')]
+    if not dates:
+        return UNKNOWN_PERIOD
+    latest = max(dates)
+    return f"{latest.year}Q{(latest.month - 1) // 3 + 1}"
+
+def next_results_due(period):
+    """When the results for the quarter after `period` should be out, or None if the period is unknown."""
+    if period == UNKNOWN_PERIOD:
+        return None
+    next_quarter_end = (pd.Period(period, freq='Q') + 1).end_time.normalize().to_pydatetime()
+    return next_quarter_end + timedelta(days=REPORTING_LAG_DAYS)
+
+def _last_4_quarters(financials, row):
+    if financials is None or financials.empty or row not in financials.index:
+        return {}
+    values = financials.loc[row][:4]
+    return {(date.strftime('%Y-%m-%d') if hasattr(date, 'strftime') else str(date)): float(value)
+            for date, value in values.items()}
+
+def fetch_fundamentals(ticker):
+    """Fetches market cap, sector, industry, P/E and the last 4 quarters' revenue/profit for one ticker.
+
+    `stock.info` and `stock.quarterly_financials` are each read exactly once;
+    the quarterly statements give both the figures and the reported period,
+    which moves every quarter (the annual `stock.financials` moves once a year).
+    """
+    stock = yf.Ticker(ticker)
+    with stage('fetch', symbol=ticker, kind='fundamentals'):
+        info = stock.info
+        financials = stock.quarterly_financials
+        count('requests', 2)
+
+    return {
+        'ticker': ticker,
+        'period': reporting_period(financials),
+        'fetched_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'info': {field: info.get(field, 'N/A') for field in INFO_FIELDS},
+        'revenue': _last_4_quarters(financials, 'Total Revenue'),
+        'profit': _last_4_quarters(financials, 'Net Income'),
+    }
+
+class FundamentalsCache:
+    """On-disk fundamentals cache keyed by ticker and the latest period its statements report.
+
+    An entry is served while it is younger than `ttl_days`, unless the next
+    quarter's results have come due since it was fetched, so new results are
+    picked up on the first lookup after they are expected.
+    """
+
+    def __init__(self, filename=FUNDAMENTALS_CACHE_FILE, ttl_days=DEFAULT_TTL_DAYS):
+        self.filename = filename
+        self.ttl = timedelta(days=ttl_days)
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.isfile(filename):
+            try:
+                with open(filename) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable fundamentals cache {filename}: {e}")
+        self.latest = {}  # ticker -> key of its most recently fetched entry
+        for key, entry in sorted(self.entries.items(), key=lambda item: item[1]['fetched_at']):
+            self.latest[entry['ticker']] = key
+
+    @staticmethod
+    def key(ticker, period):
+        return f"{ticker}|{period}"
+
+    def get(self, ticker):
+        with self.lock:
+            entry = self.entries.get(self.latest.get(ticker))
+        if entry is None:
+            return None
+        fetched_at = datetime.strptime(entry['fetched_at'], '%Y-%m-%d %H:%M:%S')
+        now = datetime.now()
+        if now - fetched_at > self.ttl:
+            return None
+        due = next_results_due(entry['period'])
+        if due is not None and fetched_at < due <= now:
+            return None  # Newer results should be out
+        return entry
+
+    def put(self, entry):
+        key = self.key(entry['ticker'], entry['period'])
+        with self.lock:
+            self.entries[key] = entry
+            self.latest[entry['ticker']] = key
+
+    def save(self):
+        """Writes the cache, keeping only each ticker's latest entry."""
+        with self.lock:
+            self.entries = {key: self.entries[key] for key in self.latest.values()}
+            tmp_file = self.filename + ".tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_file, self.filename)
+
+def load_fundamentals(ticker, cache=None):
+    """Returns fundamentals for one ticker, fetching only when the cache has no fresh entry; None if the fetch failed."""
+    return load_many([ticker], cache).get(ticker)
+
+def load_many(tickers, cache=None, max_workers=8):
+    """Loads fundamentals for many tickers concurrently and saves the cache once at the end.
+
+    Args:
+        tickers (list): Ticker symbols (e.g. ["TCS.NS", "INFY.NS"]).
+        cache (FundamentalsCache): Cache to use; the default on-disk cache if None.
+        max_workers (int): Number of concurrent fetches for tickers missing from the cache.
+
+    Returns:
+        dict: ticker -> fundamentals entry. Tickers that failed to fetch are left out
+        and listed at the end of the run.
+    """
+    cache = cache or FundamentalsCache()
+    results = {}
+    missing = []
+    for ticker in dict.fromkeys(tickers):
+        entry = cache.get(ticker)
+        if entry is not None:
+            count('cache_hits')
+            results[ticker] = entry
+        else:
+            missing.append(ticker)
+
+    if missing:
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for ticker, future in [(t, executor.submit(fetch_fundamentals, t)) for t in missing]:
+                try:
+                    entry = future.result()
+                except Exception as e:
+                    count('errors')
+                    print(f"Error fetching fundamentals for {ticker}: {e}")
+                    failed.append(ticker)
+                    continue
+                cache.put(entry)
+                results[ticker] = entry
+        cache.save()
+        if failed:
+            print(f"No fundamentals for {len(failed)} of {len(tickers)} tickers: {', '.join(failed)}")
+
+    return results
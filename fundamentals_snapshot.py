@@ -0,0 +1,149 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from fundamentals_cache import FundamentalsCache, load_many
+
+SNAPSHOT_FILE = "fundamentals_snapshot.csv"
+QUARTERS = 4
+REVENUE_COLUMNS = [f"Revenue Q{i}" for i in range(1, QUARTERS + 1)]  # Q1 is the latest period
+PROFIT_COLUMNS = [f"Profit Q{i}" for i in range(1, QUARTERS + 1)]
+SNAPSHOT_DTYPES = {
+    'SYMBOL': 'string', 'Ticker': 'string', 'Period': 'string',
+    'Market Cap': 'float64', 'Sector': 'category', 'Industry': 'category', 'PE': 'float64',
+    **{column: 'float64' for column in REVENUE_COLUMNS + PROFIT_COLUMNS},
+}
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _normalize_symbol(symbol):
+    symbol = str(symbol).strip().upper()
+    return symbol[:-3] if symbol.endswith(".NS") else symbol
+
+def snapshot_row(entry):
+    """Flattens one fundamentals cache entry into a single snapshot row.
+
+    Market cap, revenue and profit use the same thousand-crore unit as Stockinfo6.py.
+    """
+    info = entry['info']
+    revenues = list(entry['revenue'].values())[:QUARTERS]
+    profits = list(entry['profit'].values())[:QUARTERS]
+    revenues += [np.nan] * (QUARTERS - len(revenues))
+    profits += [np.nan] * (QUARTERS - len(profits))
+    row = {
+        'SYMBOL': _normalize_symbol(entry['ticker']),
+        'Ticker': entry['ticker'],
+        'Period': entry['period'],
+        'Market Cap': _to_float(info['marketCap']) / 1e7,
+        'Sector': None if info['sector'] == 'N/A' else info['sector'],
+        'Industry': None if info['industry'] == 'N/A' else info['industry'],
+        'PE': _to_float(info['trailingPE']),
+    }
+    row.update(zip(REVENUE_COLUMNS, (_to_float(v) / 1e7 for v in revenues)))
+    row.update(zip(PROFIT_COLUMNS, (_to_float(v) / 1e7 for v in profits)))
+    return row
+
+def build_snapshot(symbols=None, max_workers=16, cache=None):
+    """Builds the one-row-per-symbol fundamentals table for the whole universe.
+
+    Args:
+        symbols (list): NSE symbols without suffix; every symbol in EQUITY_L.csv if None.
+        max_workers (int): Concurrent fetches for symbols missing from the fundamentals cache.
+        cache (FundamentalsCache): Cache to read from and fill.
+
+    Returns:
+        DataFrame: Snapshot with the columns in SNAPSHOT_DTYPES.
+    """
+    if symbols is None:
+        symbols = pd.read_csv('EQUITY_L.csv')['SYMBOL'].tolist()
+    tickers = [_normalize_symbol(symbol) + ".NS" for symbol in symbols]
+    entries = load_many(tickers, cache or FundamentalsCache(), max_workers=max_workers)
+    rows = [snapshot_row(entries[ticker]) for ticker in tickers if ticker in entries]
+    snapshot = pd.DataFrame(rows, columns=list(SNAPSHOT_DTYPES))
+    return snapshot.astype(SNAPSHOT_DTYPES)
+
+def save_snapshot(snapshot, filename=SNAPSHOT_FILE):
+    snapshot.to_csv(filename, index=False)
+    print(f"Fundamentals snapshot of {len(snapshot)} symbols saved to {filename}.")
+
+def load_snapshot(filename=SNAPSHOT_FILE):
+    return pd.read_csv(filename, dtype=SNAPSHOT_DTYPES)
+
+def filter_snapshot(snapshot, sector=None, industry=None, min_pe=None, max_pe=None,
+                    min_market_cap=None, max_market_cap=None):
+    """Filters the snapshot with vectorized column masks.
+
+    Sector and industry match case-insensitively. Rows with a missing P/E or
+    market cap never pass a P/E or market-cap bound.
+    """
+    mask = np.ones(len(snapshot), dtype=bool)
+    if sector is not None:
+        mask &= (snapshot['Sector'].astype('string').str.lower() == sector.lower()).fillna(False).to_numpy(bool)
+    if industry is not None:
+        mask &= (snapshot['Industry'].astype('string').str.lower() == industry.lower()).fillna(False).to_numpy(bool)
+    pe = snapshot['PE'].to_numpy()
+    market_cap = snapshot['Market Cap'].to_numpy()
+    with np.errstate(invalid='ignore'):
+        if min_pe is not None:
+            mask &= pe >= min_pe
+        if max_pe is not None:
+            mask &= pe <= max_pe
+        if min_market_cap is not None:
+            mask &= market_cap >= min_market_cap
+        if max_market_cap is not None:
+            mask &= market_cap <= max_market_cap
+    return snapshot[mask]
+
+def join_screener(results, snapshot, symbol_column=None):
+    """Joins screener results (e.g. 52_week_breakouts.csv) with their fundamentals.
+
+    Symbols are matched with or without the .NS suffix, so the output of any
+    of the screeners can be passed in directly.
+    """
+    if symbol_column is None:
+        symbol_column = 'SYMBOL' if 'SYMBOL' in results.columns else 'Symbol'
+    keys = results[symbol_column].map(_normalize_symbol)
+    return results.assign(SYMBOL=keys).merge(snapshot, on='SYMBOL', how='inner')
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the universe-wide fundamentals snapshot.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Fetch fundamentals for every EQUITY_L.csv symbol.")
+    build.add_argument('--workers', type=int, default=16, help="Concurrent fetches.")
+    build.add_argument('--output', default=SNAPSHOT_FILE)
+
+    screen = subparsers.add_parser('screen', help="Filter the snapshot, optionally joined with screener results.")
+    screen.add_argument('--snapshot', default=SNAPSHOT_FILE)
+    screen.add_argument('--results', help="Screener output CSV (e.g. 52_week_breakouts.csv).")
+    screen.add_argument('--sector')
+    screen.add_argument('--industry')
+    screen.add_argument('--min-pe', type=float)
+    screen.add_argument('--max-pe', type=float)
+    screen.add_argument('--min-market-cap', type=float, help="In thousand crores.")
+    screen.add_argument('--max-market-cap', type=float, help="In thousand crores.")
+    screen.add_argument('--output', help="Save the matches to this CSV file.")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        save_snapshot(build_snapshot(max_workers=args.workers), args.output)
+        return
+
+    snapshot = load_snapshot(args.snapshot)
+    if args.results:
+        snapshot = join_screener(pd.read_csv(args.results), snapshot)
+    matches = filter_snapshot(snapshot, sector=args.sector, industry=args.industry,
+                              min_pe=args.min_pe, max_pe=args.max_pe,
+                              min_market_cap=args.min_market_cap, max_market_cap=args.max_market_cap)
+    print(matches.to_string(index=False) if not matches.empty else "No symbols match the filters.")
+    if args.output:
+        matches.to_csv(args.output, index=False)
+        print(f"Matches saved to {args.output}.")
+
+if __name__ == "__main__":
+    main()
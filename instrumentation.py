@@ -0,0 +1,114 @@
+import contextlib
+import json
+import time
+
+class Instrumentation:
+    """Per-stage timers and counters for scan runs.
+
+    Disabled by default: stage() hands back a shared no-op context manager and
+    count() returns after a single flag check, so leaving the calls in the
+    scripts costs next to nothing when profiling is off.
+    """
+
+    _NULL_STAGE = contextlib.nullcontext()
+
+    def __init__(self):
+        self.enabled = False
+        self.tracing = False
+        self.reset()
+
+    def reset(self):
+        self.timings = {}  # stage -> [calls, total seconds, max seconds]
+        self.counters = {}
+        self.events = []
+        self.started_at = time.perf_counter()
+
+    def enable(self, trace=False):
+        self.enabled = True
+        self.tracing = trace
+        self.reset()
+
+    def disable(self):
+        self.enabled = False
+        self.tracing = False
+
+    def stage(self, name, **labels):
+        """Context manager timing one pass through a stage (e.g. 'fetch', 'compute', 'plot', 'save')."""
+        if not self.enabled:
+            return self._NULL_STAGE
+        return self._timed_stage(name, labels)
+
+    @contextlib.contextmanager
+    def _timed_stage(self, name, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            entry = self.timings.setdefault(name, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+            if self.tracing:
+                self.events.append({'stage': name, 'start_s': round(start - self.started_at, 6),
+                                    'duration_s': round(elapsed, 6), **labels})
+
+    def count(self, name, n=1):
+        """Adds n to a counter such as 'requests', 'cache_hits' or 'frame_bytes'."""
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_fetch(self, frame):
+        """Counts one provider request and the in-memory size of the frame it returned."""
+        if not self.enabled:
+            return
+        self.count('requests')
+        if frame is not None:
+            self.count('frame_bytes', int(frame.memory_usage(index=True).sum()))
+
+    def summary(self):
+        total = time.perf_counter() - self.started_at
+        stages = []
+        for name, (calls, seconds, longest) in self.timings.items():
+            stages.append({'stage': name, 'calls': calls, 'total_s': round(seconds, 4),
+                           'avg_ms': round(seconds / calls * 1000, 3), 'max_ms': round(longest * 1000, 3),
+                           'share': round(seconds / total, 4) if total > 0 else 0.0})
+        stages.sort(key=lambda s: s['total_s'], reverse=True)
+        return {'wall_time_s': round(total, 4), 'stages': stages, 'counters': dict(self.counters)}
+
+    def print_summary(self):
+        if not self.enabled:
+            return
+        summary = self.summary()
+        print(f"\nRun time: {summary['wall_time_s']:.2f}s")
+        print(f"{'Stage':<12}{'Calls':>8}{'Total (s)':>12}{'Avg (ms)':>12}{'Max (ms)':>12}{'Share':>8}")
+        for s in summary['stages']:
+            print(f"{s['stage']:<12}{s['calls']:>8}{s['total_s']:>12.2f}{s['avg_ms']:>12.2f}"
+                  f"{s['max_ms']:>12.2f}{s['share']:>8.1%}")
+        for name, value in sorted(summary['counters'].items()):
+            print(f"{name}: {value}")
+
+    def write_trace(self, filename):
+        """Writes the summary plus every recorded stage event as JSON."""
+        with open(filename, 'w') as f:
+            json.dump({**self.summary(), 'events': self.events}, f, indent=2, default=str)
+        print(f"Trace saved to {filename}.")
+
+def add_profiling_arguments(parser):
+    parser.add_argument('--profile', action='store_true', help="Print a per-stage timing summary at the end.")
+    parser.add_argument('--trace', metavar='FILE', help="Also write a JSON trace of every stage to FILE.")
+
+def configure_from_args(args):
+    if args.profile or args.trace:
+        instrumentation.enable(trace=bool(args.trace))
+
+def finish_from_args(args):
+    instrumentation.print_summary()
+    if args.trace:
+        instrumentation.write_trace(args.trace)
+
+instrumentation = Instrumentation()
+stage = instrumentation.stage
+count = instrumentation.count
+record_fetch = instrumentation.record_fetch
@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+import yfinance as yf
+
+from instrumentation import count, record_fetch, stage
+from virtual_portfolio15 import Portfolio
+
+PORTFOLIO_DIR = "portfolios"
+PRICE_TTL = 60  # Seconds a quote is reused before it is refreshed
+
+def fetch_last_prices(symbols):
+    """Downloads the latest close for many symbols in one batched request.
+
+    Returns:
+        dict: symbol -> last price. Symbols without data are left out.
+    """
+    with stage('fetch', symbols=len(symbols)):
+        data = yf.download(list(symbols), period="5d", interval="1d", progress=False)
+        record_fetch(data)
+    if data.empty:
+        return {}
+    closes = data['Close']
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(symbols[0])
+    last = closes.ffill().iloc[-1].dropna()
+    return {symbol: float(price) for symbol, price in last.items()}
+
+class PriceFeed:
+    """Deduplicated quote cache shared by many Portfolio instances.
+
+    Quotes younger than `ttl` seconds are served from memory; refresh()
+    fetches only the stale symbols, all in one batched request.
+    """
+
+    def __init__(self, ttl=PRICE_TTL, fetch_prices=fetch_last_prices):
+        self.ttl = ttl
+        self.fetch_prices = fetch_prices
+        self.prices = {}  # symbol -> (price, fetched at)
+
+    def _is_fresh(self, symbol, now):
+        quote = self.prices.get(symbol)
+        return quote is not None and now - quote[1] <= self.ttl
+
+    def refresh(self, symbols):
+        now = time.time()
+        stale = [symbol for symbol in dict.fromkeys(symbols) if not self._is_fresh(symbol, now)]
+        count('cache_hits', len(set(symbols)) - len(stale))
+        if stale:
+            for symbol, price in self.fetch_prices(stale).items():
+                self.prices[symbol] = (price, now)
+
+    def get_price(self, symbol):
+        if not self._is_fresh(symbol, time.time()):
+            self.refresh([symbol])
+        if symbol not in self.prices:
+            raise KeyError(f"No price available for {symbol}")
+        return self.prices[symbol][0]
+
+class PortfolioManager:
+    """Many named paper portfolios sharing one PriceFeed, each persisted on its own.
+
+    Every portfolio is saved as <name>_holdings.csv plus <name>.json (cash)
+    under `directory`, and its transactions go to <name>_transactions.txt.
+    """
+
+    def __init__(self, directory=PORTFOLIO_DIR, price_feed=None):
+        self.directory = directory
+        self.price_feed = price_feed or PriceFeed()
+        self.portfolios = {}
+
+    def _path(self, name, suffix):
+        return os.path.join(self.directory, f"{name}{suffix}")
+
+    def create(self, name, cash=2000000):
+        if name in self.portfolios:
+            raise ValueError(f"Portfolio {name} already exists")
+        self.portfolios[name] = Portfolio(cash=cash, price_feed=self.price_feed)
+        return self.portfolios[name]
+
+    def get(self, name):
+        return self.portfolios[name]
+
+    def load(self, name):
+        with open(self._path(name, ".json")) as f:
+            state = json.load(f)
+        portfolio = Portfolio(cash=state['cash'], price_feed=self.price_feed)
+        holdings_file = self._path(name, "_holdings.csv")
+        if os.path.isfile(holdings_file):
+            portfolio.holdings = pd.read_csv(holdings_file)
+        self.portfolios[name] = portfolio
+        return portfolio
+
+    def load_all(self):
+        if os.path.isdir(self.directory):
+            for filename in sorted(os.listdir(self.directory)):
+                if filename.endswith(".json"):
+                    self.load(filename[:-5])
+        return self.portfolios
+
+    def save(self, name):
+        portfolio = self.portfolios[name]
+        os.makedirs(self.directory, exist_ok=True)
+        portfolio.holdings.to_csv(self._path(name, "_holdings.csv"), index=False)
+        with open(self._path(name, ".json"), 'w') as f:
+            json.dump({'cash': portfolio.cash}, f)
+        if portfolio.transaction_log:
+            portfolio.save_transaction_log(self._path(name, "_transactions.txt"))
+            portfolio.transaction_log = []
+
+    def save_all(self):
+        for name in self.portfolios:
+            self.save(name)
+
+    def symbols(self):
+        """Union of the symbols held across all portfolios."""
+        return sorted(set().union(*(set(p.holdings['Symbol']) for p in self.portfolios.values())))
+
+    def value_all(self):
+        """Values every portfolio in one pass after a single refresh of the union of their symbols.
+
+        Returns:
+            DataFrame: One row per portfolio with cash, invested amount, market value, total value and PNL.
+            A portfolio holding symbols without a quote is incomplete: its market value, total value
+            and PNL are NaN and 'Missing Quotes' lists those symbols.
+        """
+        self.price_feed.refresh(self.symbols())
+        prices = {symbol: quote[0] for symbol, quote in self.price_feed.prices.items()}
+        rows = []
+        for name, portfolio in self.portfolios.items():
+            holdings = portfolio.holdings
+            quantity = holdings['Quantity'].astype(float)
+            invested = (quantity * holdings['Buy Price'].astype(float)).sum()
+            last_prices = holdings['Symbol'].map(prices).astype(float)
+            missing = sorted(set(holdings['Symbol'][last_prices.isna()]))
+            market_value = (quantity * last_prices).sum() if not missing else float('nan')
+            rows.append({'Portfolio': name, 'Cash': round(portfolio.cash, 2), 'Invested': round(invested, 2),
+                         'Market Value': round(market_value, 2),
+                         'Total Value': round(portfolio.cash + market_value, 2),
+                         'PNL': round(market_value - invested, 2), 'Missing Quotes': ", ".join(missing)})
+        return pd.DataFrame(rows, columns=['Portfolio', 'Cash', 'Invested', 'Market Value', 'Total Value', 'PNL',
+                                           'Missing Quotes'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage and value several paper portfolios together.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    create = subparsers.add_parser('create', help="Create a new empty portfolio.")
+    create.add_argument('name')
+    create.add_argument('--cash', type=float, default=2000000)
+    subparsers.add_parser('value', help="Value every portfolio with one batched price refresh.")
+    args = parser.parse_args()
+
+    manager = PortfolioManager()
+    manager.load_all()
+    if args.command == 'create':
+        manager.create(args.name, args.cash)
+        manager.save(args.name)
+        print(f"Created portfolio {args.name} with ₹{args.cash:.2f} cash.")
+    else:
+        if not manager.portfolios:
+            print(f"No portfolios found in {PORTFOLIO_DIR}/.")
+            return
+        values = manager.value_all()
+        print(values.to_string(index=False))
+        incomplete = values[values['Missing Quotes'] != ""]
+        if not incomplete.empty:
+            print(f"\nNo quote for some holdings; {', '.join(incomplete['Portfolio'])} could not be fully valued.")
+
+if __name__ == "__main__":
+    main()
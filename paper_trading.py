@@ -0,0 +1,193 @@
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from bar_store import get_bars
+from Doji11 import detect_doji_candles
+from Golden_crossover1 import golden_cross
+from instrumentation import add_profiling_arguments, configure_from_args, finish_from_args, stage
+from multi_portfolio import PortfolioManager
+from script_loader import load_script
+from Trial26 import calculate_position_size
+from volatility import panel, volatility_shares, volatility_stops
+
+CAPITAL = 1445000
+RULES = ['breakout', 'golden_cross', 'doji']
+STOP_RULES = ['day_low', 'last_close', 'percent', 'ema5', 'ema7', 'ema9', 'ema12', 'ema15', 'ema18', 'ema21', 'ema50',
+              'atr', 'stddev']
+VOLATILITY_STOPS = ['atr', 'stddev']
+ORDERS_FILE = "paper_orders.csv"
+
+def load_histories(symbols, period='1y'):
+    """Daily history per NSE symbol from the local bar store, fetched at most once per symbol."""
+    histories = {}
+    for symbol in symbols:
+        try:
+            hist = get_bars(symbol.strip().upper() + ".NS", period, '1d')
+        except Exception as e:
+            print(f"Error fetching data for {symbol}: {e}")
+            continue
+        if len(hist) >= 2:
+            histories[symbol] = hist
+    return histories
+
+def screen(histories, rules=RULES, golden_cross_days=10):
+    """Runs the screener rules over already-loaded histories.
+
+    Returns:
+        dict: rule -> array of matching symbols.
+    """
+    breakout = load_script("52Week_Breakout.py")
+    cutoff = pd.Timestamp.now().normalize() - pd.DateOffset(days=golden_cross_days)
+    hits = {rule: [] for rule in rules}
+    for symbol, hist in histories.items():
+        with stage('compute', symbol=symbol):
+            if 'breakout' in hits and breakout.is_fresh_52_week_breakout(symbol, hist.copy()):
+                hits['breakout'].append(symbol)
+            if 'golden_cross' in hits:
+                crosses = golden_cross(hist.copy())['Golden_Crossover']
+                dates = crosses.index.tz_localize(None) if crosses.index.tz is not None else crosses.index
+                if crosses[dates >= cutoff].any():
+                    hits['golden_cross'].append(symbol)
+            if 'doji' in hits and detect_doji_candles(hist.iloc[-5:]) >= 2:
+                hits['doji'].append(symbol)
+    return {rule: np.array(symbols, dtype=object) for rule, symbols in hits.items()}
+
+def stop_losses(histories, symbols, stop_rule, stop_percent=2.5, multiplier=2.0):
+    """Stop-loss price per symbol using the same choices as Trial26.py's menu.
+
+    Volatility stops ('atr', 'stddev') are computed for the whole shortlist at once.
+    """
+    if stop_rule in VOLATILITY_STOPS:
+        if len(symbols) == 0:
+            return np.empty(0)
+        shortlist = {symbol: histories[symbol] for symbol in symbols}
+        stops = volatility_stops(panel(shortlist, 'High'), panel(shortlist, 'Low'), panel(shortlist, 'Close'),
+                                 stop_rule, multiplier)
+        return stops[list(symbols)].to_numpy()
+    stops = np.empty(len(symbols))
+    for i, symbol in enumerate(symbols):
+        hist = histories[symbol]
+        if stop_rule == 'day_low':
+            stops[i] = hist['Low'].iloc[-1]
+        elif stop_rule == 'last_close':
+            stops[i] = hist['Close'].iloc[-2]
+        elif stop_rule == 'percent':
+            stops[i] = hist['Close'].iloc[-1] * (1 - stop_percent / 100)
+        elif stop_rule.startswith('ema'):
+            stops[i] = hist['Close'].ewm(span=int(stop_rule[3:]), adjust=False).mean().iloc[-1]
+        else:
+            raise ValueError(f"Unknown stop-loss rule {stop_rule}")
+    return stops
+
+def size_orders(histories, symbols, capital=CAPITAL, stop_rule='ema21', stop_percent=2.5, multiplier=2.0):
+    """Sizes candidates with Trial26.calculate_position_size and the chosen stop-loss rule.
+
+    Candidates outside the %-change tiers (Trial26 says "Don't make any New
+    Positions") or whose stop is not below the CMP are dropped. With a
+    volatility stop the tier quantity is further capped so the distance to
+    the stop risks at most 0.25% of capital.
+
+    Returns:
+        DataFrame: One order per tradable symbol.
+    """
+    symbols = np.asarray(symbols, dtype=object)
+    if len(symbols) == 0:
+        return pd.DataFrame(columns=['Symbol', 'CMP', 'Change (%)', 'Position Size (%)', 'Capital Deployed',
+                                     'No of Shares', 'Stop Loss', 'Max Risk', '% Risk per Entire Capital'])
+    closes = np.array([histories[s]['Close'].iloc[-1] for s in symbols])
+    previous = np.array([histories[s]['Close'].iloc[-2] for s in symbols])
+    changes = np.round((closes - previous) / previous * 100, 2)
+    stops = stop_losses(histories, symbols, stop_rule, stop_percent, multiplier)
+
+    rows = []
+    for symbol, cmp, change_percent, stop in zip(symbols, closes, changes, stops):
+        position_data, error = calculate_position_size(capital, cmp, change_percent)
+        if error or stop >= cmp:
+            continue
+        position_size, capital_deployed, _, _, no_of_shares = position_data
+        if stop_rule in VOLATILITY_STOPS:
+            no_of_shares = int(volatility_shares(capital, cmp, stop, max_shares=no_of_shares))
+            capital_deployed = no_of_shares * cmp
+        if no_of_shares <= 0:
+            continue
+        max_risk = (cmp - stop) * no_of_shares
+        rows.append({'Symbol': symbol + ".NS", 'CMP': round(cmp, 2), 'Change (%)': change_percent,
+                     'Position Size (%)': position_size, 'Capital Deployed': capital_deployed,
+                     'No of Shares': no_of_shares, 'Stop Loss': round(stop, 2), 'Max Risk': round(max_risk, 2),
+                     '% Risk per Entire Capital': round(max_risk / capital * 100, 4)})
+    return pd.DataFrame(rows)
+
+def place_orders(portfolio, orders, buy_date=None):
+    """Places every order into the portfolio in one pass, at the CMP the orders were sized with.
+
+    Returns:
+        DataFrame: The orders that were filled.
+    """
+    buy_date = buy_date or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if portfolio.price_feed is not None:
+        # Prime the shared feed so fills use the sizing prices without another download
+        now = time.time()
+        for symbol, cmp in zip(orders['Symbol'], orders['CMP']):
+            portfolio.price_feed.prices[symbol] = (cmp, now)
+    filled = []
+    for symbol, cmp, quantity in zip(orders['Symbol'], orders['CMP'], orders['No of Shares']):
+        # Orders are filled in screener order until the cash runs out
+        filled.append(portfolio.cash >= cmp * quantity and portfolio.buy_stock(symbol, int(quantity), buy_date))
+    return orders[np.array(filled, dtype=bool)] if len(orders) else orders
+
+def run_pipeline(symbols, rules=RULES, stop_rule='ema21', stop_percent=2.5, capital=CAPITAL, manager=None,
+                 multiplier=2.0):
+    """Screen -> size -> trade in one pass; each rule trades into its own paper portfolio.
+
+    A hit the rule's portfolio already holds is not bought again, so a golden
+    cross or doji that stays a hit for several sessions is entered only once.
+
+    Returns:
+        DataFrame: All filled orders with their rule.
+    """
+    manager = manager or PortfolioManager()
+    manager.load_all()
+    histories = load_histories(symbols)
+    hits = screen(histories, rules)
+    all_filled = []
+    for rule in rules:
+        orders = size_orders(histories, hits[rule], capital, stop_rule, stop_percent, multiplier)
+        portfolio = manager.portfolios.get(rule) or manager.create(rule, capital)
+        held = orders['Symbol'].isin(portfolio.holdings['Symbol']).to_numpy(dtype=bool)
+        filled = place_orders(portfolio, orders[~held])
+        print(f"{rule}: {len(hits[rule])} hits, {len(orders)} sized, {held.sum()} already held, "
+              f"{len(filled)} filled.")
+        all_filled.append(filled.assign(Rule=rule))
+    with stage('save'):
+        manager.save_all()
+    return pd.concat(all_filled, ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen, size and paper-trade in one run.")
+    parser.add_argument('--rules', nargs='+', choices=RULES, default=RULES)
+    parser.add_argument('--stop', choices=STOP_RULES, default='ema21', help="Stop-loss rule.")
+    parser.add_argument('--stop-percent', type=float, default=2.5, help="Stop distance for --stop percent.")
+    parser.add_argument('--multiplier', type=float, default=2.0, help="ATRs/std-devs below the close for --stop atr/stddev.")
+    parser.add_argument('--capital', type=float, default=CAPITAL)
+    parser.add_argument('--symbols', nargs='+', help="NSE symbols to scan (default: all of EQUITY_L.csv).")
+    add_profiling_arguments(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+
+    symbols = args.symbols or pd.read_csv('EQUITY_L.csv')['SYMBOL'].tolist()
+    filled = run_pipeline(symbols, args.rules, args.stop, args.stop_percent, args.capital, multiplier=args.multiplier)
+    if not filled.empty:
+        filled.to_csv(ORDERS_FILE, mode='a', header=not os.path.isfile(ORDERS_FILE), index=False)
+        print(filled.to_string(index=False))
+        print(f"Orders saved to {ORDERS_FILE}.")
+    else:
+        print("No orders placed.")
+    finish_from_args(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from instrumentation import record_fetch, stage
+
+BOOK_FILE = "open_positions.csv"  # Columns: Symbol, Quantity, Price, Stop Loss
+MAX_OPEN_RISK_PCT = 2.0  # Total risk to stops across all open positions, % of capital
+MAX_SECTOR_RISK_PCT = 1.0  # Risk to stops within one sector, % of capital
+MAX_VAR_PCT = 3.0  # 1-day 95% portfolio VaR, % of capital
+
+def open_risk(quantities, prices, stops):
+    """Per-position risk to the stop loss: (price - stop) * quantity, floored at zero."""
+    quantities = np.asarray(quantities, dtype=float)
+    return np.maximum(np.asarray(prices, dtype=float) - np.asarray(stops, dtype=float), 0.0) * quantities
+
+def sector_risk(risk, sectors):
+    """Sums position risk per sector.
+
+    Returns:
+        Series: sector -> total risk, largest first.
+    """
+    sectors = np.asarray([s if isinstance(s, str) and s else 'Unknown' for s in sectors], dtype=object)
+    names, codes = np.unique(sectors, return_inverse=True)
+    totals = np.bincount(codes, weights=np.asarray(risk, dtype=float), minlength=len(names))
+    return pd.Series(totals, index=names).sort_values(ascending=False)
+
+def covariance(returns):
+    """Covariance matrix of a (sessions x symbols) daily returns matrix; NaNs count as zero returns."""
+    returns = np.nan_to_num(np.asarray(returns, dtype=float))
+    return np.atleast_2d(np.cov(returns, rowvar=False))
+
+def portfolio_var(values, cov, confidence=0.95, horizon_days=1):
+    """Parametric (covariance) value at risk of positions worth `values` rupees."""
+    values = np.asarray(values, dtype=float)
+    sigma = np.sqrt(max(values @ cov @ values, 0.0))
+    return NormalDist().inv_cdf(confidence) * sigma * np.sqrt(horizon_days)
+
+def marginal_var(values, cov, confidence=0.95):
+    """Each position's marginal VaR: the VaR change per extra rupee held in it."""
+    values = np.asarray(values, dtype=float)
+    sigma = np.sqrt(max(values @ cov @ values, 0.0))
+    if sigma == 0:
+        return np.zeros_like(values)
+    return NormalDist().inv_cdf(confidence) * (cov @ values) / sigma
+
+def evaluate_book(book, returns, capital, sectors=None, new_trade=None, confidence=0.95):
+    """Aggregates the risk of an open book and, optionally, the effect of one proposed trade.
+
+    Args:
+        book (DataFrame): Open positions with Symbol, Quantity, Price and Stop Loss columns.
+        returns (DataFrame): Daily returns with one column per symbol (book and new trade).
+        capital (float): Total trading capital the percentages refer to.
+        sectors (dict): symbol -> sector, e.g. from the fundamentals snapshot.
+        new_trade (dict): Proposed entry with Symbol, Quantity, Price and Stop Loss.
+
+    Returns:
+        dict: Open risk, sector risk, VaR and per-symbol marginal VaR of the
+        book (with the trade, if given), plus the open risk and VaR before the
+        trade, its incremental VaR and any limits it would breach.
+    """
+    sectors = sectors or {}
+    positions = book[['Symbol', 'Quantity', 'Price', 'Stop Loss']]
+    if new_trade is not None:
+        positions = pd.concat([positions, pd.DataFrame([new_trade])[positions.columns]], ignore_index=True)
+        positions = positions.groupby('Symbol', as_index=False, sort=False).agg(
+            {'Quantity': 'sum', 'Price': 'last', 'Stop Loss': 'last'})
+
+    symbols = positions['Symbol'].to_numpy()
+    quantities = positions['Quantity'].to_numpy(float)
+    prices = positions['Price'].to_numpy(float)
+    values = quantities * prices
+    risk = open_risk(quantities, prices, positions['Stop Loss'].to_numpy(float))
+    cov = covariance(returns.reindex(columns=symbols))
+
+    in_book = np.isin(symbols, book['Symbol'].to_numpy())
+    book_values = np.where(in_book, values, 0.0)
+    if new_trade is not None:
+        # The proposed quantity is only part of its row when the symbol was already held
+        existing = book.loc[book['Symbol'] == new_trade['Symbol'], 'Quantity'].sum()
+        book_values = np.where(symbols == new_trade['Symbol'], existing * prices, book_values)
+
+    result = {
+        'open_risk': float(risk.sum()),
+        'open_risk_pct': float(risk.sum() / capital * 100),
+        'sector_risk': sector_risk(risk, [sectors.get(s) for s in symbols]),
+        'var': float(portfolio_var(values, cov, confidence)),
+        'marginal_var': pd.Series(marginal_var(values, cov, confidence), index=symbols),
+        'breaches': [],
+    }
+    result['var_pct'] = result['var'] / capital * 100
+    if new_trade is None:
+        return result
+
+    book_risk = open_risk(book['Quantity'], book['Price'], book['Stop Loss']).sum()
+    result['open_risk_before_pct'] = float(book_risk / capital * 100)
+    result['var_before'] = float(portfolio_var(book_values, cov, confidence))
+    result['incremental_var'] = result['var'] - result['var_before']
+    result['new_trade_risk'] = float(open_risk([new_trade['Quantity']], [new_trade['Price']],
+                                               [new_trade['Stop Loss']])[0])
+
+    if result['open_risk_pct'] > MAX_OPEN_RISK_PCT:
+        result['breaches'].append(f"total open risk {result['open_risk_pct']:.2f}% > {MAX_OPEN_RISK_PCT}%")
+    trade_sector = sectors.get(new_trade['Symbol']) or 'Unknown'
+    sector_pct = result['sector_risk'].get(trade_sector, 0.0) / capital * 100
+    if sector_pct > MAX_SECTOR_RISK_PCT:
+        result['breaches'].append(f"{trade_sector} sector risk {sector_pct:.2f}% > {MAX_SECTOR_RISK_PCT}%")
+    if result['var_pct'] > MAX_VAR_PCT:
+        result['breaches'].append(f"portfolio VaR {result['var_pct']:.2f}% > {MAX_VAR_PCT}%")
+    return result
+
+def fetch_returns(symbols, period="1y"):
+    """Daily close-to-close returns for many symbols from one batched download."""
+    symbols = list(dict.fromkeys(symbols))
+    with stage('fetch', symbols=len(symbols)):
+        data = yf.download(symbols, period=period, interval="1d", progress=False)
+        record_fetch(data)
+    closes = data['Close']
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(symbols[0])
+    return closes.pct_change(fill_method=None).iloc[1:]
+
+def load_book(filename=BOOK_FILE):
+    if not os.path.isfile(filename):
+        return pd.DataFrame(columns=['Symbol', 'Quantity', 'Price', 'Stop Loss'])
+    return pd.read_csv(filename)
+
+def load_sectors(snapshot_file="fundamentals_snapshot.csv"):
+    """symbol (with .NS) -> sector from the fundamentals snapshot, if it has been built."""
+    if not os.path.isfile(snapshot_file):
+        return {}
+    snapshot = pd.read_csv(snapshot_file, usecols=['Ticker', 'Sector'])
+    return dict(zip(snapshot['Ticker'], snapshot['Sector']))
+
+def check_new_trade(symbol, quantity, price, stop_loss, capital, book_file=BOOK_FILE):
+    """Prints the open book's risk with and without a proposed trade.
+
+    Returns:
+        list: Limit breaches the trade would cause (empty if it fits).
+    """
+    book = load_book(book_file)
+    new_trade = {'Symbol': symbol, 'Quantity': quantity, 'Price': price, 'Stop Loss': stop_loss}
+    returns = fetch_returns(list(book['Symbol']) + [symbol])
+    result = evaluate_book(book, returns, capital, load_sectors(), new_trade)
+
+    print(f"\nPortfolio risk ({len(book)} open positions in {book_file}):")
+    print(f"Total Open Risk: {result['open_risk_before_pct']:.2f}% -> {result['open_risk_pct']:.2f}% of capital")
+    print(f"1-Day 95% VaR: Rs.{result['var_before']:.2f} -> Rs.{result['var']:.2f} "
+          f"(incremental Rs.{result['incremental_var']:.2f})")
+    for sector, risk in result['sector_risk'].items():
+        print(f"  {sector}: Rs.{risk:.2f} ({risk / capital * 100:.2f}%)")
+    for breach in result['breaches']:
+        print(f"Be careful, this trade takes {breach}.")
+    return result['breaches']
@@ -0,0 +1,159 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_store import ATR_PERIOD, COLUMN_INDEX
+from instrumentation import add_profiling_arguments, configure_from_args, finish_from_args, stage
+from sizing_daemon import CAPITAL, STOPS, sizing_result
+from sizing_service import SizingEngine, history_features, read_watchlist, stale_history
+from Trial26 import calculate_position_size
+from volatility import STDDEV_WINDOW, intraday_stop
+
+TABLE_FILE = "premarket_table.npy"
+SHORTLISTS = ['52_week_breakouts.csv', 'golden_cross_results.csv', 'doji_candles_detection_results.csv']
+EMA_STOP_DAYS = [5, 7, 9, 12, 15, 18, 21, 50]  # Trial26.py's EMA stop-loss choices
+TIER_CHANGES = [0.5, 1, 1.5, 2, 2.5, 3, 3.5]  # Top of each %-change band in Trial26.calculate_position_size
+
+TABLE_DTYPE = np.dtype([
+    ('symbol', 'U24'),
+    ('session', 'datetime64[D]'),  # Session of the previous close the record is built from
+    ('previous_close', 'f8'),
+    ('previous_high', 'f8'),
+    ('previous_low', 'f8'),
+    ('ema', 'f8', (len(EMA_STOP_DAYS),)),  # EMA stop levels as of the previous close
+    ('atr', 'f8'),
+    ('closes', 'f8', (STDDEV_WINDOW + 1,)),
+    ('tier_shares', 'i8', (len(TIER_CHANGES),)),  # Shares per tier at the previous close
+])
+
+def build_table(symbols, capital=CAPITAL, history=history_features):
+    """Precomputes everything a trade needs except the live price, one record per symbol."""
+    table = np.zeros(len(symbols), dtype=TABLE_DTYPE)
+    filled = np.zeros(len(symbols), dtype=bool)
+    for i, symbol in enumerate(symbols):
+        try:
+            with stage('compute', symbol=symbol):
+                rows, last_date = history(symbol)
+        except Exception as e:
+            print(f"Error loading history for {symbol}: {e}")
+            continue
+        if rows is None or len(rows) < STDDEV_WINDOW + 1:
+            print(f"Not enough history for {symbol}.")
+            continue
+        reason = stale_history(symbol, last_date)
+        if reason:
+            print(reason)
+            continue
+        last = rows[-1]
+        previous_close = last[COLUMN_INDEX['Close']]
+        table[i] = (symbol, np.datetime64(last_date, 'D'), previous_close, last[COLUMN_INDEX['High']],
+                    last[COLUMN_INDEX['Low']], [last[COLUMN_INDEX[f"EMA_{days}"]] for days in EMA_STOP_DAYS],
+                    last[COLUMN_INDEX[f"ATR_{ATR_PERIOD}"]], rows[-(STDDEV_WINDOW + 1):, COLUMN_INDEX['Close']],
+                    [calculate_position_size(capital, previous_close, change)[0][4] for change in TIER_CHANGES])
+        filled[i] = True
+    return table[filled]
+
+def save_table(table, filename=TABLE_FILE):
+    tmp_file = filename[:-4] + ".tmp.npy"
+    np.save(tmp_file, table)
+    os.replace(tmp_file, filename)
+
+def load_table(filename=TABLE_FILE):
+    """Returns (table, symbol -> row index)."""
+    table = np.load(filename)
+    return table, {symbol: i for i, symbol in enumerate(table['symbol'])}
+
+def finalize(record, price, day_high=None, day_low=None, capital=CAPITAL, stop='ema', stop_percent=2.5,
+             ema_days=21, multiplier=2.0):
+    """Finishes a precomputed record with the live price and, if known, the day's range so far.
+
+    Returns:
+        dict: The same fields as sizing_daemon.size_trade.
+    """
+    previous_close = float(record['previous_close'])
+    change_percent = round((price - previous_close) / previous_close * 100, 2)
+    position_data, error = calculate_position_size(capital, price, change_percent)
+    if error:
+        return {'error': error, 'cmp': price, 'change_percent': change_percent}
+    if stop not in STOPS:
+        return {'error': f"Unknown stop {stop}. Choose from {', '.join(STOPS)}."}
+    if stop == 'ema' and ema_days not in EMA_STOP_DAYS:
+        return {'error': f"EMA days must be one of {EMA_STOP_DAYS}"}
+
+    ema = record['ema'][EMA_STOP_DAYS.index(ema_days)] if ema_days in EMA_STOP_DAYS else None
+    stop_loss = intraday_stop(stop, price, previous_close, ema, ema_days, record['atr'], record['closes'],
+                              np.nan if day_high is None else day_high, np.nan if day_low is None else day_low,
+                              stop_percent, multiplier)
+    if stop_loss is None:
+        return {'error': "The day's low is needed for a day_low stop."}
+    return sizing_result(str(record['symbol']), capital, price, change_percent, position_data, stop_loss, stop)
+
+def engine_from_table(table, quote_source=None):
+    """A SizingEngine warmed from the precomputed table instead of history, skipping out-of-date records."""
+    engine = SizingEngine(quote_source)
+    for record in table:
+        reason = stale_history(str(record['symbol']), pd.Timestamp(record['session']))
+        if reason:
+            print(f"{reason} Rebuild {TABLE_FILE} with: python premarket.py build")
+            continue
+        emas = dict(zip(EMA_STOP_DAYS, record['ema']))
+        engine.state[str(record['symbol'])] = {'session': pd.Timestamp(record['session']),
+                                               'previous_close': record['previous_close'], 'emas': emas,
+                                               'atr': record['atr'], 'closes': record['closes'].copy()}
+    return engine
+
+def shortlisted_symbols(files=SHORTLISTS):
+    symbols = []
+    for filename in files:
+        if os.path.isfile(filename):
+            symbols += read_watchlist(filename)
+    return list(dict.fromkeys(symbols))
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute sizing inputs for the screener shortlists before the open.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help="Build premarket_table.npy from the shortlists.")
+    build.add_argument('--files', nargs='+', default=SHORTLISTS, help="Screener CSVs to take symbols from.")
+    build.add_argument('--symbols', nargs='+', help="Extra symbols (e.g. TCS.NS).")
+    build.add_argument('--capital', type=float, default=CAPITAL)
+    add_profiling_arguments(build)
+    size = subparsers.add_parser('size', help="Size a shortlisted symbol from the table and a live price.")
+    size.add_argument('symbol')
+    size.add_argument('price', type=float, help="Live price (CMP).")
+    size.add_argument('--day-low', type=float)
+    size.add_argument('--day-high', type=float)
+    size.add_argument('--stop', choices=STOPS, default='ema')
+    size.add_argument('--stop-percent', type=float, default=2.5)
+    size.add_argument('--ema-days', type=int, default=21)
+    size.add_argument('--multiplier', type=float, default=2.0)
+    size.add_argument('--capital', type=float, default=CAPITAL)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        configure_from_args(args)
+        symbols = shortlisted_symbols(args.files) + [s.upper() for s in args.symbols or []]
+        table = build_table(list(dict.fromkeys(symbols)), args.capital)
+        with stage('save'):
+            save_table(table)
+        print(f"Precomputed {len(table)} of {len(symbols)} shortlisted symbols into {TABLE_FILE}.")
+        finish_from_args(args)
+        return
+
+    table, index = load_table()
+    symbol = args.symbol.upper()
+    if symbol not in index:
+        print(f"{symbol} is not in {TABLE_FILE}. Run: python premarket.py build --symbols {symbol}")
+        return
+    reason = stale_history(symbol, pd.Timestamp(table[index[symbol]]['session']))
+    if reason:
+        print(f"{reason} Run: python premarket.py build")
+        return
+    result = finalize(table[index[symbol]], args.price, args.day_high, args.day_low, args.capital, args.stop,
+                      args.stop_percent, args.ema_days, args.multiplier)
+    for key, value in result.items():
+        print(f"{key.replace('_', ' ').title()}: {value}")
+
+if __name__ == "__main__":
+    main()
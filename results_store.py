@@ -0,0 +1,160 @@
+import argparse
+import json
+import numbers
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RESULTS_DB = "screener_results.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    rule TEXT NOT NULL,
+    started_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    rule TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    event_date TEXT NOT NULL,
+    data TEXT NOT NULL,
+    first_run INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (rule, symbol, event_date)
+);
+CREATE INDEX IF NOT EXISTS results_by_run ON results (rule, run_id);
+CREATE TABLE IF NOT EXISTS cursors (
+    consumer TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    PRIMARY KEY (consumer, rule)
+);
+"""
+
+# Only rows whose fields changed are touched, so run_id marks exactly the rows each run added or changed
+UPSERT = """
+INSERT INTO results (rule, symbol, event_date, data, first_run, run_id, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (rule, symbol, event_date) DO UPDATE
+SET data = excluded.data, run_id = excluded.run_id, updated_at = excluded.updated_at
+WHERE data != excluded.data
+"""
+
+def _field(value):
+    """A hit field as plain JSON: NumPy scalars become Python numbers, and floats are rounded to ignore float noise."""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return round(float(value), 4)
+    return value
+
+class ResultsStore:
+    """Screener hits keyed by (rule, symbol, event date) in SQLite.
+
+    Each run upserts its hits: unchanged hits are left alone, new or changed
+    ones are stamped with the run's id. Consumers keep a cursor per rule, so
+    "what's new since I last looked" is one indexed query.
+    """
+
+    def __init__(self, filename=RESULTS_DB):
+        self.connection = sqlite3.connect(filename)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def record(self, rule, hits, symbol_column='Symbol', date_column='Date'):
+        """Upserts one run's hits for a rule.
+
+        Args:
+            hits (list): Dicts with a symbol and an event date; every other
+                field is stored with the hit and compared on later runs.
+
+        Returns:
+            tuple: (run id, number of new hits, number of changed hits).
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        with self.connection:
+            run_id = self.connection.execute("INSERT INTO runs (rule, started_at) VALUES (?, ?)",
+                                             (rule, now)).lastrowid
+            rows = []
+            for hit in hits:
+                fields = {key: _field(value) for key, value in hit.items() if key not in (symbol_column, date_column)}
+                rows.append((rule, str(hit[symbol_column]), pd.Timestamp(hit[date_column]).strftime('%Y-%m-%d'),
+                             json.dumps(fields, sort_keys=True, default=str), run_id, run_id, now))
+            self.connection.executemany(UPSERT, rows)
+            new, changed = self.connection.execute(
+                "SELECT SUM(first_run = ?), SUM(first_run != ?) FROM results WHERE rule = ? AND run_id = ?",
+                (run_id, run_id, rule, run_id)).fetchone()
+        return run_id, new or 0, changed or 0
+
+    def _frame(self, rows):
+        records = [dict(json.loads(row['data']), Rule=row['rule'], Symbol=row['symbol'], Date=row['event_date'])
+                   for row in rows]
+        columns = ['Rule', 'Symbol', 'Date']
+        frame = pd.DataFrame(records)
+        return frame[columns + [c for c in frame.columns if c not in columns]] if records else pd.DataFrame(
+            columns=columns)
+
+    def results(self, rule=None):
+        """Every stored hit (for one rule or all), oldest event first, one row per (rule, symbol, date)."""
+        query = "SELECT * FROM results" + (" WHERE rule = ?" if rule else "") + " ORDER BY event_date, symbol"
+        return self._frame(self.connection.execute(query, (rule,) if rule else ()).fetchall())
+
+    def since(self, rule, run_id, until=None):
+        """Hits for a rule added or changed after run `run_id` (and up to run `until`, if given)."""
+        query = "SELECT * FROM results WHERE rule = ? AND run_id > ?" + (" AND run_id <= ?" if until else "")
+        params = (rule, run_id, until) if until else (rule, run_id)
+        return self._frame(self.connection.execute(query + " ORDER BY event_date, symbol", params).fetchall())
+
+    def changes(self, consumer, rule, advance=True):
+        """Hits for a rule that `consumer` hasn't seen yet; by default marks them as seen."""
+        row = self.connection.execute("SELECT run_id FROM cursors WHERE consumer = ? AND rule = ?",
+                                      (consumer, rule)).fetchone()
+        last_seen = row['run_id'] if row else 0
+        latest = self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM runs WHERE rule = ?", (rule,)).fetchone()[0]
+        delta = self.since(rule, last_seen, latest)  # Bounded, so a run finishing meanwhile isn't skipped
+        if advance:
+            with self.connection:
+                self.connection.execute("INSERT INTO cursors (consumer, rule, run_id) VALUES (?, ?, ?) "
+                                        "ON CONFLICT (consumer, rule) DO UPDATE SET run_id = excluded.run_id",
+                                        (consumer, rule, latest))
+        return delta
+
+    def rules(self):
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT rule FROM results ORDER BY rule")]
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the screener results store.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    show = subparsers.add_parser('show', help="Print every stored hit for a rule.")
+    show.add_argument('rule', nargs='?', help="Rule name (default: all rules).")
+    new = subparsers.add_parser('new', help="Print the hits a consumer hasn't seen yet and mark them seen.")
+    new.add_argument('consumer', help="Name of the consumer (e.g. charts, sizing).")
+    new.add_argument('--rules', nargs='+', help="Rules to read (default: all rules).")
+    new.add_argument('--peek', action='store_true', help="Don't mark the hits as seen.")
+    new.add_argument('--csv', help="Also write the new hits to this CSV (e.g. for sizing_service.py --watchlist-file).")
+    args = parser.parse_args()
+
+    store = ResultsStore()
+    if args.command == 'show':
+        frame = store.results(args.rule)
+    else:
+        frames = [store.changes(args.consumer, rule, advance=not args.peek) for rule in args.rules or store.rules()]
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        if args.csv:
+            frame.to_csv(args.csv, index=False)
+    store.close()
+    if frame.empty:
+        print("No hits.")
+    else:
+        print(frame.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
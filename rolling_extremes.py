@@ -0,0 +1,233 @@
+import os
+import pickle
+from collections import deque
+from datetime import time, timedelta
+
+import pandas as pd
+import yfinance as yf
+
+from data_quality import clean_bars, report_quality
+from instrumentation import count, record_fetch, stage
+from trading_calendar import EXCHANGE_TZ, default_calendar, exchange_now
+
+EXTREMES_FILE = "rolling_extremes.pkl"
+WINDOW = 252  # Trading sessions in 52 weeks
+FIELDS = {'High': 'max', 'Low': 'min', 'Close': 'both', 'Volume': 'both'}
+MARKET_CLOSE = time(15, 30)  # NSE close; today's bar is only final after this
+
+def _naive(timestamp):
+    return timestamp.tz_localize(None) if timestamp.tzinfo is not None else timestamp
+
+class RollingExtremes:
+    """Rolling max/min over the last `window` bars using monotonic deques.
+
+    Each push is amortized O(1): a value evicts every older value it
+    dominates, so the front of each deque is always the current extreme.
+    """
+
+    def __init__(self, window=WINDOW, track_max=True, track_min=True):
+        self.window = window
+        self.count = 0  # Bars seen so far; also the index of the next bar
+        self.max_deque = deque() if track_max else None  # (index, value), values decreasing
+        self.min_deque = deque() if track_min else None  # (index, value), values increasing
+
+    def push(self, value):
+        index = self.count
+        self.count += 1
+        oldest = index - self.window + 1
+        if self.max_deque is not None:
+            while self.max_deque and self.max_deque[-1][1] <= value:
+                self.max_deque.pop()
+            self.max_deque.append((index, value))
+            while self.max_deque[0][0] < oldest:
+                self.max_deque.popleft()
+        if self.min_deque is not None:
+            while self.min_deque and self.min_deque[-1][1] >= value:
+                self.min_deque.pop()
+            self.min_deque.append((index, value))
+            while self.min_deque[0][0] < oldest:
+                self.min_deque.popleft()
+
+    @property
+    def max(self):
+        return self.max_deque[0][1] if self.max_deque else None
+
+    @property
+    def min(self):
+        return self.min_deque[0][1] if self.min_deque else None
+
+class RollingExtremesStore:
+    """52-week extremes per symbol and field, updated one daily bar at a time.
+
+    Tracks the rolling max of High, the rolling min of Low and both extremes
+    of Close and Volume. `last_date` per symbol makes updates idempotent, so
+    re-feeding bars that were already applied is a no-op. The 52-week high
+    as it stood before the latest bar is kept too, which is what the fresh
+    breakout check compares against.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.symbols = {}  # symbol -> {'last_date': Timestamp, 'fields': {field: RollingExtremes}}
+
+    def _new_state(self):
+        return {'last_date': None, 'last_high': None, 'previous_52_week_high': None,
+                'fields': {field: RollingExtremes(self.window, track_max=kind in ('max', 'both'),
+                                                  track_min=kind in ('min', 'both'))
+                           for field, kind in FIELDS.items()}}
+
+    def update(self, symbol, date, bar):
+        """Applies one daily bar (a mapping with High/Low/Close/Volume). Returns False if already applied."""
+        state = self.symbols.get(symbol)
+        if state is None:
+            state = self.symbols[symbol] = self._new_state()
+        date = _naive(pd.Timestamp(date))
+        if state['last_date'] is not None and date <= state['last_date']:
+            return False
+        state['previous_52_week_high'] = state['fields']['High'].max
+        for field, extremes in state['fields'].items():
+            extremes.push(float(bar[field]))
+        state['last_date'] = date
+        state['last_high'] = float(bar['High'])
+        return True
+
+    def update_from_history(self, symbol, hist):
+        """Applies every bar in a yfinance history frame newer than the symbol's last update.
+
+        Returns:
+            int: Number of bars applied.
+        """
+        last_date = self.last_date(symbol)
+        if last_date is not None:
+            index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+            hist = hist[index > last_date]
+        for date, bar in zip(hist.index, hist[list(FIELDS)].to_dict('records')):
+            self.update(symbol, date, bar)
+        return len(hist)
+
+    def rescale(self, symbol, ex_date, price_factor, volume_factor=1.0):
+        """Re-adjusts a symbol's windows for a corporate action effective on `ex_date`.
+
+        Scaling every value by the same positive factor keeps each deque's
+        order, so the windows stay valid. A symbol that already holds bars
+        from the ex-date on mixes both scales and is dropped instead, to be
+        reseeded on its next refresh.
+
+        Returns:
+            bool: True if the symbol was rescaled, False if it was unknown or dropped.
+        """
+        state = self.symbols.get(symbol)
+        if state is None or state['last_date'] is None:
+            return False
+        if state['last_date'] >= _naive(pd.Timestamp(ex_date)):
+            del self.symbols[symbol]
+            return False
+        for field, extremes in state['fields'].items():
+            factor = volume_factor if field == 'Volume' else price_factor
+            for deque_ in (extremes.max_deque, extremes.min_deque):
+                if deque_ is not None:
+                    for i, (index, value) in enumerate(deque_):
+                        deque_[i] = (index, value * factor)
+        for key in ('last_high', 'previous_52_week_high'):
+            if state[key] is not None:
+                state[key] *= price_factor
+        return True
+
+    def last_date(self, symbol):
+        state = self.symbols.get(symbol)
+        return state['last_date'] if state else None
+
+    def extremes(self, symbol):
+        """Returns the current 52-week high/low price and volume for a symbol, or None if unknown."""
+        state = self.symbols.get(symbol)
+        if state is None or state['last_date'] is None:
+            return None
+        fields = state['fields']
+        return {
+            '52_week_high': fields['High'].max,
+            '52_week_low': fields['Low'].min,
+            'highest_close': fields['Close'].max,
+            'lowest_close': fields['Close'].min,
+            'highest_volume': fields['Volume'].max,
+            'lowest_volume': fields['Volume'].min,
+            'last_high': state['last_high'],
+            'previous_52_week_high': state['previous_52_week_high'],
+            'last_date': state['last_date'],
+        }
+
+    def table(self):
+        """Returns the current extremes for every symbol as one DataFrame."""
+        rows = {symbol: self.extremes(symbol) for symbol in self.symbols}
+        return pd.DataFrame.from_dict({k: v for k, v in rows.items() if v}, orient='index')
+
+    def save(self, filename=EXTREMES_FILE):
+        tmp_file = filename + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({'window': self.window, 'symbols': self.symbols}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, filename)
+
+    @classmethod
+    def load(cls, filename=EXTREMES_FILE, window=WINDOW):
+        """Loads a saved store, or returns an empty one if the file doesn't exist yet."""
+        if not os.path.isfile(filename):
+            return cls(window)
+        with open(filename, 'rb') as f:
+            data = pickle.load(f)
+        store = cls(data['window'])
+        store.symbols = data['symbols']
+        return store
+
+def completed_bars(hist):
+    """Drops today's bar before the market close, when it is still forming.
+
+    Applying a partial session would freeze it into the rolling window.
+    """
+    now = exchange_now()  # The close is 15:30 in Mumbai, wherever this runs
+    if hist.empty or now.time() >= MARKET_CLOSE:
+        return hist
+    index = hist.index.tz_convert(EXCHANGE_TZ).tz_localize(None) if hist.index.tz is not None else hist.index
+    return hist[index.normalize() < pd.Timestamp(now.date())]
+
+def refresh_symbol(store, ticker, seed_period="1y"):
+    """Brings one symbol up to date, downloading only the bars after its last update.
+
+    A symbol the store hasn't seen yet is seeded with `seed_period` of history.
+
+    Returns:
+        int: Number of new bars applied.
+    """
+    last_date = store.last_date(ticker)
+    stock = yf.Ticker(ticker)
+    if last_date is None:
+        with stage('fetch', symbol=ticker):
+            hist = stock.history(period=seed_period)
+            record_fetch(hist)
+    else:
+        if last_date >= default_calendar().last_completed_session():
+            count('cache_hits')  # Nothing has closed since the last update (e.g. weekends, holidays)
+            return 0
+        start = last_date.date() + timedelta(days=1)
+        with stage('fetch', symbol=ticker):
+            hist = stock.history(start=start)
+            record_fetch(hist)
+    hist = clean_bars(ticker, completed_bars(hist))
+    if hist is None or hist.empty:
+        return 0  # Quarantined bars are never frozen into the rolling windows
+    return store.update_from_history(ticker, hist)
+
+def main():
+    # Refresh every EQUITY_L.csv symbol and dump the universe-wide 52-week extremes table
+    symbols = pd.read_csv('EQUITY_L.csv')['SYMBOL'].tolist()
+    store = RollingExtremesStore.load()
+    for symbol in symbols:
+        try:
+            refresh_symbol(store, symbol.strip().upper() + ".NS")
+        except Exception as e:
+            print(f"Error updating {symbol}: {e}")
+    store.save()
+    store.table().to_csv('52_week_extremes.csv', index_label='Ticker')
+    print(f"52-week extremes for {len(store.symbols)} symbols saved to {EXTREMES_FILE} and 52_week_extremes.csv.")
+    report_quality()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from trading_calendar import MARKET_CLOSE, MARKET_OPEN, default_calendar, exchange_now
+
+SCHEDULE_FILE = "schedule.json"
+STATE_FILE = "scheduler_state.json"
+
+# 'at' jobs run once per session at that time (Asia/Kolkata); 'every' jobs run every N minutes while the
+# market is open; 'after' jobs run as soon as the named job finishes successfully. The evening jobs form
+# one chain because they share files: rolling_extremes.pkl, the feature store and the results store.
+# 'per_session' jobs are skipped if they already completed for the latest finished session.
+JOBS = [
+    {'name': 'premarket', 'at': '08:45', 'command': ['premarket.py', 'build'], 'per_session': True},
+    {'name': 'rolling_extremes', 'at': '15:45', 'command': ['rolling_extremes.py'], 'per_session': True},
+    {'name': 'feature_store', 'after': 'rolling_extremes', 'command': ['feature_store.py'], 'per_session': True},
+    {'name': '52week_breakout', 'after': 'feature_store', 'command': ['52Week_Breakout.py', '--incremental'],
+     'per_session': True},
+    {'name': 'golden_crossover', 'after': '52week_breakout', 'command': ['Golden_crossover1.py', '--features'],
+     'per_session': True},
+    {'name': 'doji', 'after': 'golden_crossover', 'command': ['Doji11.py'], 'per_session': True},
+    {'name': 'charts', 'after': 'doji', 'command': ['chart_renderer.py', '--new-hits'], 'per_session': True},
+    {'name': 'portfolio_monitor', 'every': 15, 'command': ['multi_portfolio.py', 'value']},
+]
+
+def load_jobs(filename=SCHEDULE_FILE):
+    """Jobs from schedule.json (same shape as JOBS) if it exists, otherwise the defaults."""
+    if not os.path.isfile(filename):
+        return JOBS
+    with open(filename) as f:
+        return json.load(f)
+
+def next_run(job, now, calendar):
+    """The next time a job is due, always on a session and never on a weekend or holiday."""
+    day = now.date()
+    if not calendar.is_session(day):
+        day = calendar.next_session(day).date()
+    if 'at' in job:
+        run_at = datetime.combine(day, datetime.strptime(job['at'], '%H:%M').time())
+        if run_at <= now:
+            run_at = datetime.combine(calendar.next_session(day).date(), run_at.time())
+        return run_at
+
+    step = timedelta(minutes=job['every'])
+    open_at, close_at = datetime.combine(day, MARKET_OPEN), datetime.combine(day, MARKET_CLOSE)
+    if now < open_at:
+        return open_at
+    run_at = open_at + step * (-(-(now - open_at) // step))  # Next slot on the session's grid
+    if run_at < close_at:
+        return run_at
+    return datetime.combine(calendar.next_session(day).date(), MARKET_OPEN)
+
+class Scheduler:
+    """Runs each job's script as a subprocess when it is due, one asyncio task per job."""
+
+    def __init__(self, jobs, calendar=None, state_file=STATE_FILE):
+        names = {job['name'] for job in jobs}
+        for job in jobs:
+            if 'after' in job and job['after'] not in names:
+                raise ValueError(f"{job['name']} runs after {job['after']}, which is not a job")
+        self.jobs = jobs
+        self.calendar = calendar or default_calendar()
+        self.state_file = state_file
+        self.state = {}  # job name -> last session it completed for
+        if os.path.isfile(state_file):
+            with open(state_file) as f:
+                self.state = json.load(f)
+
+    def _log(self, message):
+        print(f"[{exchange_now():%Y-%m-%d %H:%M:%S}] {message}", flush=True)
+
+    def dependents(self, name):
+        return [job for job in self.jobs if job.get('after') == name]
+
+    def _save_state(self):
+        tmp_file = self.state_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    async def run_chain(self, job):
+        """Runs a job, then each job that runs after it, in order; a failed job stops the jobs after it."""
+        returncode = await self.run_job(job)
+        if returncode not in (None, 0):
+            for dependent in self.dependents(job['name']):
+                self._log(f"{dependent['name']}: not run because {job['name']} failed.")
+            return
+        for dependent in self.dependents(job['name']):
+            await self.run_chain(dependent)
+
+    async def run_job(self, job):
+        """Runs one job now. Returns its exit code, or None if it was skipped."""
+        session = self.calendar.last_completed_session().strftime('%Y-%m-%d')
+        if job.get('per_session') and self.state.get(job['name']) == session:
+            self._log(f"{job['name']}: already done for the {session} session, skipping.")
+            return None
+        self._log(f"{job['name']}: starting {' '.join(job['command'])}")
+        process = await asyncio.create_subprocess_exec(sys.executable, *job['command'])
+        returncode = await process.wait()
+        self._log(f"{job['name']}: finished with exit code {returncode}")
+        if returncode == 0 and job.get('per_session'):
+            self.state[job['name']] = session
+            self._save_state()
+        return returncode
+
+    async def job_loop(self, job):
+        while True:
+            try:
+                run_at = next_run(job, exchange_now(), self.calendar)
+            except ValueError as e:
+                self._log(f"{job['name']}: no next run ({e}); stopping this job.")
+                return
+            self._log(f"{job['name']}: next run at {run_at:%Y-%m-%d %H:%M}")
+            await asyncio.sleep(max((run_at - exchange_now()).total_seconds(), 0))
+            await self.run_chain(job)
+
+    async def run(self):
+        await asyncio.gather(*(self.job_loop(job) for job in self.jobs if 'after' not in job))
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the screeners and monitor on the NSE trading calendar.")
+    parser.add_argument('--run-now', metavar='JOB', help="Run one job immediately and exit.")
+    parser.add_argument('--list', action='store_true', help="Show each job's next run time and exit.")
+    args = parser.parse_args()
+
+    scheduler = Scheduler(load_jobs())
+    if exchange_now().year not in scheduler.calendar.holiday_years:
+        print(f"nse_holidays.csv has no holidays for {exchange_now().year}; add them before scheduling.")
+        sys.exit(1)
+    if args.list:
+        for job in scheduler.jobs:
+            when = (f"after {job['after']}" if 'after' in job
+                    else f"{next_run(job, exchange_now(), scheduler.calendar):%Y-%m-%d %H:%M} IST")
+            print(f"{job['name']}: {when}")
+    elif args.run_now:
+        job = next((job for job in scheduler.jobs if job['name'] == args.run_now), None)
+        if job is None:
+            print(f"Unknown job {args.run_now}. Jobs: {', '.join(job['name'] for job in scheduler.jobs)}")
+            sys.exit(1)
+        asyncio.run(scheduler.run_job(job))
+    else:
+        try:
+            asyncio.run(scheduler.run())
+        except KeyboardInterrupt:
+            print("Scheduler stopped.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import importlib.util
+import os
+import sys
+
+def load_script(filename):
+    """Imports one of the repo scripts by file name.
+
+    Some scripts (e.g. 52Week_Breakout.py) start with a digit, so they can't be
+    imported with a plain import statement.
+
+    Args:
+        filename (str): Script file name relative to the repo root (e.g. "Trial26.py").
+
+    Returns:
+        module: The loaded module. Repeated calls return the same module object.
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    module_name = "_script_" + os.path.splitext(filename)[0].lower()
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,133 @@
+import argparse
+import json
+import socket
+import socketserver
+import sys
+
+# Only the standard library is imported here, so the client side starts instantly;
+# the server imports Trial26 (and with it yfinance) once and keeps it warm.
+HOST = "127.0.0.1"
+PORT = 8765
+CAPITAL = 1445000
+STOPS = ['day_low', 'last_close', 'percent', 'ema', 'atr', 'stddev']
+
+def size_trade(symbol, capital=CAPITAL, stop='day_low', stop_percent=2.5, ema_days=21, multiplier=2.0):
+    """Trial26.py's sizing and stop-loss calculation without the prompts.
+
+    Returns:
+        dict: The values Trial26 prints, or {'error': ...}.
+    """
+    import Trial26
+
+    price, change = Trial26.get_stock_data(symbol)
+    if not (price and change):
+        return {'error': f"Stock data not found for {symbol}"}
+    cmp, change_percent = float(price), float(change.strip("%"))
+    position_data, error = Trial26.calculate_position_size(capital, cmp, change_percent)
+    if error:
+        return {'error': error, 'cmp': cmp, 'change_percent': change_percent}
+
+    if stop == 'day_low':
+        stop_loss = Trial26.get_stop_loss(symbol, use_day_low=True)
+    elif stop == 'last_close':
+        stop_loss = Trial26.get_last_session_close(symbol)
+    elif stop == 'percent':
+        stop_loss = cmp - (cmp * (stop_percent / 100))
+    elif stop == 'ema':
+        stop_loss = (Trial26.get_stop_loss(symbol, ema_days=[ema_days]) or {}).get(ema_days)
+    elif stop in ('atr', 'stddev'):
+        stop_loss = Trial26.get_volatility_stop(symbol, stop, multiplier)
+    else:
+        return {'error': f"Unknown stop {stop}. Choose from {', '.join(STOPS)}."}
+    return sizing_result(symbol, capital, cmp, change_percent, position_data, stop_loss, stop)
+
+def sizing_result(symbol, capital, cmp, change_percent, position_data, stop_loss, stop):
+    """Assembles the response for a sized trade; volatility stops also cap the shares at 0.25% risk."""
+    if not stop_loss:
+        return {'error': "Unable to calculate stop loss."}
+    position_size, capital_deployed, _, _, no_of_shares = position_data
+    if stop in ('atr', 'stddev') and stop_loss < cmp:
+        from volatility import volatility_shares
+        no_of_shares = int(volatility_shares(capital, cmp, stop_loss, max_shares=no_of_shares))
+        capital_deployed = no_of_shares * cmp
+
+    max_risk = float((cmp - stop_loss) * no_of_shares)
+    return {
+        'symbol': symbol,
+        'cmp': cmp,
+        'change_percent': change_percent,
+        'position_size': position_size,
+        'capital_deployed': round(capital_deployed, 2),
+        'no_of_shares': no_of_shares,
+        'stop_loss': round(float(stop_loss), 2),
+        'max_risk': round(max_risk, 2),
+        'risk_on_deployed_percent': round(max_risk / capital_deployed * 100, 4) if capital_deployed else None,
+        'risk_per_entire_capital_percent': round(max_risk / capital * 100, 4),
+    }
+
+class SizingHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line in, one JSON response per line out."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = size_trade(**request)
+            except Exception as e:
+                response = {'error': str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode())
+
+class SizingServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+def serve(host=HOST, port=PORT):
+    import Trial26  # noqa: F401  Pay the heavy imports once, before the first request
+    import yfinance  # noqa: F401
+    with SizingServer((host, port), SizingHandler) as server:
+        print(f"Sizing daemon listening on {host}:{port}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Sizing daemon stopped.")
+
+def request_sizing(request, host=HOST, port=PORT, timeout=30):
+    """Sends one sizing request to a running daemon and returns its response."""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall((json.dumps(request) + "\n").encode())
+        with sock.makefile('r') as reader:
+            return json.loads(reader.readline())
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep the sizing code warm and answer requests over a local socket.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve', help="Run the daemon.")
+    serve_parser.add_argument('--port', type=int, default=PORT)
+    size_parser = subparsers.add_parser('size', help="Ask a running daemon to size a trade.")
+    size_parser.add_argument('symbol', help="Stock symbol (e.g., RELIANCE.NS).")
+    size_parser.add_argument('--stop', choices=STOPS, default='day_low')
+    size_parser.add_argument('--stop-percent', type=float, default=2.5)
+    size_parser.add_argument('--ema-days', type=int, default=21)
+    size_parser.add_argument('--multiplier', type=float, default=2.0)
+    size_parser.add_argument('--capital', type=float, default=CAPITAL)
+    size_parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(port=args.port)
+        return
+    try:
+        response = request_sizing({'symbol': args.symbol.upper(), 'capital': args.capital, 'stop': args.stop,
+                                   'stop_percent': args.stop_percent, 'ema_days': args.ema_days,
+                                   'multiplier': args.multiplier}, port=args.port)
+    except ConnectionRefusedError:
+        print(f"No sizing daemon on port {args.port}. Start one with: python sizing_daemon.py serve")
+        sys.exit(1)
+    if 'error' in response:
+        print(response['error'])
+        sys.exit(1)
+    for key, value in response.items():
+        print(f"{key.replace('_', ' ').title()}: {value}")
+
+if __name__ == "__main__":
+    main()
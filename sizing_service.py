@@ -0,0 +1,267 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from bar_store import get_bars
+from feature_store import ATR_PERIOD, COLUMN_INDEX, EMA_SPANS, FeatureStore, compute_features
+from instrumentation import record_fetch, stage
+from rolling_extremes import completed_bars
+from sizing_daemon import CAPITAL, STOPS, sizing_result
+from trading_calendar import default_calendar
+from Trial26 import calculate_position_size
+from volatility import STDDEV_WINDOW, intraday_stop
+
+HOST = "127.0.0.1"
+PORT = 8766
+REFRESH_SECONDS = 15  # How often the watchlist quotes are re-downloaded
+
+class YahooQuoteSource:
+    """Live price, day high and day low for many symbols from one batched download."""
+
+    def quotes(self, symbols):
+        with stage('fetch', symbols=len(symbols)):
+            data = yf.download(list(symbols), period="1d", interval="1d", progress=False)
+            record_fetch(data)
+        if data.empty:
+            return {}
+        fields = {}
+        for field in ('Close', 'High', 'Low'):
+            frame = data[field]
+            if isinstance(frame, pd.Series):
+                frame = frame.to_frame(symbols[0])
+            fields[field] = frame.ffill().iloc[-1]
+        return {symbol: {'price': float(fields['Close'][symbol]), 'day_high': float(fields['High'][symbol]),
+                         'day_low': float(fields['Low'][symbol])}
+                for symbol in fields['Close'].dropna().index}
+
+class FakeQuoteSource:
+    """Quotes from a dict (symbol -> {'price', 'day_high', 'day_low'}), for testing without a network."""
+
+    def __init__(self, quotes):
+        self.prices = dict(quotes)
+
+    def quotes(self, symbols):
+        return {symbol: self.prices[symbol] for symbol in symbols if symbol in self.prices}
+
+def history_features(ticker):
+    """Feature rows for a ticker and the session of the last row, or (None, None) without history.
+
+    The rows come from the feature store if it has the last completed
+    session, else they are computed from the bar store.
+    """
+    rows, dates = FeatureStore().arrays(ticker)
+    if rows is not None and len(rows) and pd.Timestamp(dates[-1]) >= default_calendar().last_completed_session():
+        return np.asarray(rows[-(STDDEV_WINDOW + 1):]), pd.Timestamp(dates[-1])
+    bars = completed_bars(get_bars(ticker, '2y', '1d'))
+    if bars.empty:
+        return None, None
+    index = bars.index.tz_localize(None) if bars.index.tz is not None else bars.index
+    return compute_features(bars)[-(STDDEV_WINDOW + 1):], index[-1].normalize()
+
+def stale_history(symbol, last_date):
+    """Why history ending on `last_date` can't be finished with today's quote, or None if it can."""
+    session = default_calendar().last_completed_session()
+    if last_date == session:
+        return None
+    return (f"History for {symbol} ends on {last_date:%Y-%m-%d}, not the last completed session "
+            f"({session:%Y-%m-%d}).")
+
+class SizingEngine:
+    """In-memory sizing for a watchlist: every answer is arithmetic on warm state.
+
+    Per symbol it keeps the previous session's close, EMAs and ATR plus the
+    last closes; the live quote then finishes today's EMA/ATR/std-dev with one
+    recursive step each, so no request touches the network. State records the
+    session it was built from and is re-warmed once a later session completes.
+    """
+
+    def __init__(self, quote_source=None, history=history_features, refresh_seconds=REFRESH_SECONDS):
+        self.quote_source = quote_source or YahooQuoteSource()
+        self.history = history
+        self.refresh_seconds = refresh_seconds
+        self.state = {}  # symbol -> previous sessions' close, EMAs, ATR and closes
+        self.quotes = {}  # symbol -> quote dict plus 'time'
+        self.lock = threading.Lock()
+
+    def warm(self, symbols):
+        """Loads history state and quotes for symbols that aren't warm yet.
+
+        History whose last row isn't the last completed session is rejected:
+        finishing it with today's quote would skip (or repeat) a session.
+        """
+        with self.lock:
+            missing = [symbol for symbol in symbols if symbol not in self.state]
+        for symbol in missing:
+            rows, last_date = self.history(symbol)  # Outside the lock: this may download bars
+            if rows is None or len(rows) == 0:
+                print(f"No history found for {symbol}.")
+                continue
+            reason = stale_history(symbol, last_date)
+            if reason:
+                print(reason)
+                continue
+            last = rows[-1]
+            state = {
+                'session': last_date,
+                'previous_close': last[COLUMN_INDEX['Close']],
+                'emas': {span: last[COLUMN_INDEX[f"EMA_{span}"]] for span in EMA_SPANS},
+                'atr': last[COLUMN_INDEX[f"ATR_{ATR_PERIOD}"]],
+                'closes': rows[:, COLUMN_INDEX['Close']].copy(),
+            }
+            with self.lock:
+                self.state[symbol] = state
+        self.refresh([symbol for symbol in missing if symbol in self.state])
+
+    def expire(self, symbols=None):
+        """Re-warms symbols whose state was built before the last completed session."""
+        session = default_calendar().last_completed_session()
+        with self.lock:
+            stale = [symbol for symbol in (list(self.state) if symbols is None else symbols)
+                     if symbol in self.state and self.state[symbol]['session'] != session]
+            for symbol in stale:
+                del self.state[symbol]
+        if stale:
+            self.warm(stale)
+
+    def refresh(self, symbols=None):
+        symbols = list(self.state) if symbols is None else symbols
+        if not symbols:
+            return
+        quotes = self.quote_source.quotes(symbols)
+        now = time.time()
+        with self.lock:
+            for symbol, quote in quotes.items():
+                self.quotes[symbol] = dict(quote, time=now)
+
+    def refresh_forever(self):
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                self.expire()
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing quotes: {e}")
+
+    def stop_loss(self, symbol, quote, stop='day_low', stop_percent=2.5, ema_days=21, multiplier=2.0):
+        if stop not in STOPS:
+            raise ValueError(f"Unknown stop {stop}. Choose from {', '.join(STOPS)}.")
+        state = self.state[symbol]
+        return intraday_stop(stop, quote['price'], state['previous_close'], state['emas'].get(int(ema_days)),
+                             int(ema_days), state['atr'], state['closes'], quote['day_high'], quote['day_low'],
+                             stop_percent, multiplier)
+
+    def size(self, symbol, capital=CAPITAL, stop='day_low', stop_percent=2.5, ema_days=21, multiplier=2.0):
+        """Trial26.py's position size and stop loss for a symbol from warm state.
+
+        Returns:
+            dict: The same fields as sizing_daemon.size_trade, plus the quote's age in seconds.
+        """
+        self.expire([symbol])  # After the close the previous session's state is a day old
+        if symbol not in self.state:
+            self.warm([symbol])  # Slow once per session; later requests for the symbol are in-memory
+        with self.lock:
+            quote = self.quotes.get(symbol)
+        if symbol not in self.state or quote is None:
+            return {'error': f"Stock data not found for {symbol}"}
+        if stop == 'ema' and int(ema_days) not in EMA_SPANS:
+            return {'error': f"EMA days must be one of {EMA_SPANS}"}
+        cmp = quote['price']
+        previous_close = self.state[symbol]['previous_close']
+        change_percent = round((cmp - previous_close) / previous_close * 100, 2)
+        position_data, error = calculate_position_size(capital, cmp, change_percent)
+        if error:
+            return {'error': error, 'cmp': cmp, 'change_percent': change_percent}
+        stop_loss = self.stop_loss(symbol, quote, stop, stop_percent, ema_days, multiplier)
+        result = sizing_result(symbol, capital, cmp, change_percent, position_data, stop_loss, stop)
+        result['quote_age_s'] = round(time.time() - quote['time'], 1)
+        return result
+
+class SizingRequestHandler(BaseHTTPRequestHandler):
+    """GET /size?symbol=TCS.NS&stop=ema&ema_days=21 returns the sizing as JSON."""
+
+    engine = None
+    numbers = {'capital': float, 'stop_percent': float, 'ema_days': int, 'multiplier': float}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/watchlist':
+            self._reply(200, {'symbols': sorted(self.engine.state)})
+            return
+        if url.path != '/size':
+            self._reply(404, {'error': "Use /size?symbol=... or /watchlist"})
+            return
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if 'symbol' not in params:
+            self._reply(400, {'error': "symbol is required"})
+            return
+        try:
+            kwargs = {key: self.numbers.get(key, str)(value) for key, value in params.items()}
+            kwargs['symbol'] = kwargs['symbol'].upper()
+            start = time.perf_counter()
+            result = self.engine.size(**kwargs)
+            result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            self._reply(200, result)
+        except (TypeError, ValueError) as e:
+            self._reply(400, {'error': str(e)})
+        except Exception as e:  # History or quote download failed while warming the symbol
+            self._reply(502, {'error': f"Could not load data for {params['symbol'].upper()}: {e}"})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass  # Keep the console for errors
+
+def make_server(engine, host=HOST, port=PORT):
+    handler = type('Handler', (SizingRequestHandler,), {'engine': engine})
+    return ThreadingHTTPServer((host, port), handler)
+
+def read_watchlist(filename):
+    """Symbols from a screener CSV (Symbol or SYMBOL column); bare NSE symbols get .NS."""
+    frame = pd.read_csv(filename)
+    column = 'Symbol' if 'Symbol' in frame else 'SYMBOL'
+    return [s if s.endswith('.NS') else s + '.NS' for s in frame[column].astype(str).str.strip().str.upper()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident HTTP service that sizes trades from warm quotes and EMAs.")
+    parser.add_argument('--watchlist', nargs='*', default=[], help="Symbols to pre-warm (e.g. TCS.NS INFY.NS).")
+    parser.add_argument('--watchlist-file', help="Screener CSV whose symbols are pre-warmed.")
+    parser.add_argument('--table', action='store_true', help="Warm from premarket_table.npy (see premarket.py).")
+    parser.add_argument('--refresh', type=float, default=REFRESH_SECONDS, help="Seconds between quote refreshes.")
+    parser.add_argument('--port', type=int, default=PORT)
+    args = parser.parse_args()
+
+    symbols = [s.upper() for s in args.watchlist]
+    if args.watchlist_file:
+        symbols += read_watchlist(args.watchlist_file)
+    if args.table:
+        from premarket import engine_from_table, load_table
+        engine = engine_from_table(load_table()[0])
+        engine.refresh()
+    else:
+        engine = SizingEngine()
+    engine.refresh_seconds = args.refresh
+    engine.warm(list(dict.fromkeys(symbols)))
+    threading.Thread(target=engine.refresh_forever, daemon=True).start()
+    with make_server(engine, port=args.port) as server:
+        print(f"Sizing service for {len(engine.state)} symbols on http://{HOST}:{args.port}/size?symbol=...",
+              flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Sizing service stopped.")
+
+if __name__ == "__main__":
+    main()
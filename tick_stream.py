@@ -0,0 +1,161 @@
+import argparse
+import csv
+import time
+from datetime import datetime
+
+import numpy as np
+
+from instrumentation import count
+
+TICK_COLUMNS = ['Datetime', 'Symbol', 'Price', 'Volume']  # Tick file layout, one tick per row
+
+class TickAggregator:
+    """Running session OHLCV per symbol in fixed-size arrays.
+
+    The universe is fixed up front; each symbol owns one slot in every array,
+    so a tick is a handful of scalar updates and every query is an index
+    lookup. `levels` holds a reference price per symbol (e.g. the prior
+    52-week high) for breakout queries.
+    """
+
+    def __init__(self, symbols, levels=None):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        n = len(self.symbols)
+        self.open = np.full(n, np.nan)
+        self.high = np.full(n, np.nan)
+        self.low = np.full(n, np.nan)
+        self.close = np.full(n, np.nan)
+        self.volume = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.last_time = [None] * n
+        self.levels = np.full(n, np.inf) if levels is None else np.asarray(levels, dtype=float)
+
+    def reset(self):
+        """Clears the running bars for a new session; levels are kept."""
+        for array in (self.open, self.high, self.low, self.close):
+            array.fill(np.nan)
+        self.volume.fill(0)
+        self.ticks.fill(0)
+        self.last_time = [None] * len(self.symbols)
+
+    def on_tick(self, symbol, price, volume=0, timestamp=None):
+        """Applies one tick. Returns the symbol's slot, or None if it isn't in the universe."""
+        i = self.index.get(symbol)
+        if i is None:
+            count('ticks_ignored')
+            return None
+        if self.ticks[i] == 0:
+            self.open[i] = self.high[i] = self.low[i] = price
+        elif price > self.high[i]:
+            self.high[i] = price
+        elif price < self.low[i]:
+            self.low[i] = price
+        self.close[i] = price
+        self.volume[i] += volume
+        self.ticks[i] += 1
+        self.last_time[i] = timestamp
+        return i
+
+    def bar(self, symbol):
+        """The running session bar for a symbol as a dict (None before its first tick)."""
+        i = self.index[symbol]
+        if self.ticks[i] == 0:
+            return None
+        return {'Open': float(self.open[i]), 'High': float(self.high[i]), 'Low': float(self.low[i]),
+                'Close': float(self.close[i]),
+                'Volume': int(self.volume[i]), 'Time': self.last_time[i]}
+
+    def day_low(self, symbol):
+        i = self.index[symbol]
+        return float(self.low[i]) if self.ticks[i] else None
+
+    def day_high(self, symbol):
+        i = self.index[symbol]
+        return float(self.high[i]) if self.ticks[i] else None
+
+    def is_breakout(self, symbol):
+        """True once the session high has traded above the symbol's level."""
+        i = self.index[symbol]
+        return bool(self.ticks[i]) and self.high[i] > self.levels[i]
+
+    def breakouts(self):
+        """Every symbol whose session high is above its level, in one vectorized pass."""
+        mask = (self.ticks > 0) & (self.high > self.levels)
+        return [self.symbols[i] for i in np.flatnonzero(mask)]
+
+class AggregatorQuoteSource:
+    """Adapts a TickAggregator to the quotes() interface of sizing_service.SizingEngine."""
+
+    def __init__(self, aggregator):
+        self.aggregator = aggregator
+
+    def quotes(self, symbols):
+        quotes = {}
+        for symbol in symbols:
+            bar = self.aggregator.bar(symbol) if symbol in self.aggregator.index else None
+            if bar is not None:
+                quotes[symbol] = {'price': bar['Close'], 'day_high': bar['High'], 'day_low': bar['Low']}
+        return quotes
+
+def replay_file(filename, speed=None):
+    """Yields (timestamp, symbol, price, volume) ticks from a CSV file in TICK_COLUMNS layout.
+
+    With `speed` (e.g. 1.0 for real time, 10.0 for ten times faster) the gaps
+    between tick timestamps are replayed; without it ticks come as fast as
+    they can be read.
+    """
+    previous = None
+    with open(filename, newline='') as f:
+        for row in csv.DictReader(f):
+            timestamp = datetime.fromisoformat(row['Datetime'])
+            if speed and previous is not None:
+                time.sleep(max((timestamp - previous).total_seconds() / speed, 0))
+            previous = timestamp
+            yield timestamp, row['Symbol'], float(row['Price']), int(float(row['Volume'] or 0))
+
+def poll_quotes(symbols, quote_source, interval=5.0):
+    """Yields ticks by polling a quote source (e.g. sizing_service.YahooQuoteSource) every `interval` seconds.
+
+    Polled quotes carry no traded volume, so their ticks have volume 0.
+    """
+    while True:
+        now = datetime.now()
+        for symbol, quote in quote_source.quotes(symbols).items():
+            yield now, symbol, quote['price'], 0
+        time.sleep(interval)
+
+def consume(aggregator, ticks, on_tick=None):
+    """Feeds a tick stream into the aggregator, calling on_tick(slot, timestamp) after each applied tick.
+
+    Returns:
+        int: Number of ticks read.
+    """
+    n = 0
+    for timestamp, symbol, price, volume in ticks:
+        n += 1
+        i = aggregator.on_tick(symbol, price, volume, timestamp)
+        if on_tick is not None and i is not None:
+            on_tick(i, timestamp)
+    return n
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a tick file into running session bars.")
+    parser.add_argument('ticks', help=f"CSV file with columns {', '.join(TICK_COLUMNS)}.")
+    parser.add_argument('--speed', type=float, help="Replay speed relative to real time (default: as fast as possible).")
+    args = parser.parse_args()
+
+    with open(args.ticks, newline='') as f:
+        symbols = list(dict.fromkeys(row['Symbol'] for row in csv.DictReader(f)))
+    aggregator = TickAggregator(symbols)
+    start = time.perf_counter()
+    n = consume(aggregator, replay_file(args.ticks, args.speed))
+    elapsed = time.perf_counter() - start
+    for symbol in symbols:
+        bar = aggregator.bar(symbol)
+        print(f"{symbol}: O {bar['Open']:.2f} H {bar['High']:.2f} L {bar['Low']:.2f} C {bar['Close']:.2f} "
+              f"V {bar['Volume']}")
+    print(f"{n} ticks for {len(symbols)} symbols in {elapsed:.3f}s.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+HOLIDAYS_FILE = "nse_holidays.csv"  # One Date column; add each year's NSE trading holidays as they're announced
+EXCHANGE_TZ = ZoneInfo("Asia/Kolkata")
+MARKET_OPEN = time(9, 15)
+MARKET_CLOSE = time(15, 30)
+HISTORY_YEARS = 11  # bar_archive.py keeps 10 years of bars; one more covers lookbacks from its first bar
+
+def exchange_now():
+    """The current wall-clock time in Mumbai (naive), whatever the machine's time zone."""
+    return datetime.now(EXCHANGE_TZ).replace(tzinfo=None)
+
+def _day(date):
+    return np.datetime64(pd.Timestamp(date).date(), 'D')
+
+class TradingCalendar:
+    """NSE sessions (weekdays that aren't trading holidays) as a sorted array.
+
+    Every calendar day in range also gets the index of the latest session on
+    or before it, so previous/next session lookups are array reads instead
+    of a day-by-day walk. Only years in the holiday file (`holidays_from`
+    to `holidays_until`) know their holidays. Years before it, back to
+    HISTORY_YEARS ago so long histories can be walked, and the year after
+    the current one count only weekends as closed; the first lookup past
+    the holiday file prints one warning, since its holidays will be taken
+    for sessions. "Today" and "now" default to the exchange's time zone.
+    """
+
+    def __init__(self, holidays, start=None, end=None):
+        holidays = np.unique(np.asarray([_day(d) for d in holidays], dtype='datetime64[D]'))
+        if not len(holidays):
+            raise ValueError("The trading calendar needs at least one year of holidays")
+        self.holidays = holidays
+        self.holiday_years = sorted({int(str(d)[:4]) for d in holidays})
+        first_year, last_year = self.holiday_years[0], self.holiday_years[-1]
+        self.holidays_from = np.datetime64(f"{first_year}-01-01", 'D')
+        self.holidays_until = np.datetime64(f"{last_year}-12-31", 'D')
+        history_year = min(first_year, exchange_now().year - HISTORY_YEARS)
+        end_year = max(last_year, exchange_now().year) + 1  # Weekdays-only slack past the holiday file
+        self.start = _day(start) if start is not None else np.datetime64(f"{history_year}-01-01", 'D')
+        self.end = _day(end) if end is not None else np.datetime64(f"{end_year}-12-31", 'D')
+        self._warned = False
+
+        days = np.arange(self.start, self.end + 1, dtype='datetime64[D]')
+        self._is_session = np.is_busday(days, holidays=holidays)
+        self.sessions = days[self._is_session]
+        self._at_or_before = np.cumsum(self._is_session) - 1  # -1 before the first session
+
+    def _check(self, days):
+        """Raises if any day falls outside the calendar; warns once about days past the holiday file."""
+        days = np.atleast_1d(days)
+        if np.any(days > self.end):
+            raise ValueError(f"{days.max()} is after the trading calendar ends ({self.end})")
+        if not self._warned and np.any(days > self.holidays_until):
+            self._warned = True
+            print(f"Warning: {HOLIDAYS_FILE} has no holidays after {self.holidays_until}; treating every weekday "
+                  f"from then on as a session. Add the NSE holidays for {str(days.max())[:4]}.")
+        if np.any(days < self.start):
+            raise ValueError(f"{days.min()} is before the trading calendar starts ({self.start})")
+
+    def _offset(self, date):
+        day = _day(date)
+        self._check(day)
+        return int((day - self.start).astype(int))
+
+    def is_session(self, date):
+        return bool(self._is_session[self._offset(date)])
+
+    def latest_session(self, date=None):
+        """The session on or before `date` (default today)."""
+        index = self._at_or_before[self._offset(date if date is not None else exchange_now())]
+        if index < 0:
+            raise ValueError(f"No session on or before {date} in the trading calendar")
+        return pd.Timestamp(self.sessions[index])
+
+    def previous_session(self, date=None):
+        """The last session strictly before `date` (default today)."""
+        offset = self._offset(date if date is not None else exchange_now())
+        index = self._at_or_before[offset] - self._is_session[offset]
+        if index < 0:
+            raise ValueError(f"No session before {date} in the trading calendar")
+        return pd.Timestamp(self.sessions[index])
+
+    def next_session(self, date=None):
+        """The first session strictly after `date` (default today)."""
+        index = self._at_or_before[self._offset(date if date is not None else exchange_now())] + 1
+        if index >= len(self.sessions):
+            raise ValueError(f"No session after {date} in the trading calendar")
+        return pd.Timestamp(self.sessions[index])
+
+    def last_completed_session(self, now=None):
+        """The latest session whose daily bar is final: today after the close, otherwise the previous session."""
+        now = now or exchange_now()
+        if self.is_session(now) and now.time() >= MARKET_CLOSE:
+            return pd.Timestamp(now.date())
+        return self.previous_session(now)
+
+    def is_open(self, now=None):
+        now = now or exchange_now()
+        return self.is_session(now) and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+    def _latest_index(self, dates):
+        days = np.asarray(pd.DatetimeIndex(np.atleast_1d(dates)).normalize(), dtype='datetime64[D]')
+        self._check(days)
+        return np.searchsorted(self.sessions, days, side='right') - 1
+
+    def _at(self, index):
+        if np.any(index < 0) or np.any(index >= len(self.sessions)):
+            raise ValueError("Session offset falls outside the trading calendar")
+        return pd.DatetimeIndex(self.sessions[index])
+
+    def shift_sessions(self, dates, n):
+        """The session `n` sessions after (n > 0) or before (n < 0) the latest session on or before each date.
+
+        `dates` may be a single date or an array; the result is always a DatetimeIndex.
+        """
+        return self._at(self._latest_index(dates) + n)
+
+    def sessions_between(self, start, end):
+        """Number of sessions in [start, end], element-wise for arrays of dates."""
+        starts = np.asarray(pd.DatetimeIndex(np.atleast_1d(start)).normalize(), dtype='datetime64[D]')
+        ends = np.asarray(pd.DatetimeIndex(np.atleast_1d(end)).normalize(), dtype='datetime64[D]')
+        self._check(np.concatenate([starts, ends]))
+        counts = np.searchsorted(self.sessions, ends, side='right') - np.searchsorted(self.sessions, starts)
+        return np.maximum(counts, 0)
+
+    def last_sessions(self, n, end=None):
+        """The exact `n` sessions ending with the latest session on or before `end` (default today)."""
+        last = self._latest_index(end if end is not None else exchange_now())[0]
+        return self._at(np.arange(last - n + 1, last + 1))
+
+def load_calendar(filename=HOLIDAYS_FILE):
+    return TradingCalendar(pd.read_csv(filename)['Date'])
+
+_default_calendar = None
+
+def default_calendar():
+    """The calendar built from nse_holidays.csv, loaded once per process."""
+    global _default_calendar
+    if _default_calendar is None:
+        _default_calendar = load_calendar()
+    return _default_calendar
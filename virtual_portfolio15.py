@@ -4,13 +4,19 @@ from datetime import datetime
 import matplotlib.pyplot as plt
 
 class Portfolio:
-    def __init__(self):
+    def __init__(self, cash=2000000, price_feed=None):
         self.holdings = pd.DataFrame(columns=['Symbol', 'Quantity', 'Buy Price', 'Buy Date'])
-        self.cash = 2000000  # Starting with 2,000,000 rupees
+        self.cash = cash  # Starting with 2,000,000 rupees by default
         self.transaction_log = []
+        self.price_feed = price_feed  # Shared multi_portfolio.PriceFeed, if any
+
+    def get_current_price(self, symbol):
+        if self.price_feed is not None:
+            return self.price_feed.get_price(symbol)
+        return yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1]
 
     def buy_stock(self, symbol, quantity, buy_date):
-        current_price = yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1]
+        current_price = self.get_current_price(symbol)
         total_value = current_price * quantity
         if self.cash < total_value:
             print("Not enough cash to buy.")
@@ -41,7 +47,7 @@ class Portfolio:
             print(f"Not enough quantity to sell {quantity} shares of {symbol}.")
             return False
 
-        current_price = yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1]
+        current_price = self.get_current_price(symbol)
         total_value = current_price * quantity
         self.cash += total_value
         self.transaction_log.append({'Date': sell_date, 'Action': 'SELL', 'Symbol': symbol, 'Quantity': quantity, 'Price': current_price, 'Total Value': total_value, 'Cash Balance': self.cash})
@@ -55,7 +61,7 @@ class Portfolio:
         for index, row in self.holdings.iterrows():
             symbol = row['Symbol']
             quantity = row['Quantity']
-            current_price = yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1]
+            current_price = self.get_current_price(symbol)
             total_value = current_price * quantity
             self.cash += total_value
             self.transaction_log.append({'Date': sell_date, 'Action': 'SELL', 'Symbol': symbol, 'Quantity': quantity, 'Price': current_price, 'Total Value': total_value, 'Cash Balance': self.cash})
@@ -67,7 +73,7 @@ class Portfolio:
         for index, row in self.holdings.iterrows():
             symbol = row['Symbol']
             quantity = row['Quantity']
-            current_price = yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1]
+            current_price = self.get_current_price(symbol)
             total_value += quantity * current_price
         total_value += self.cash  # Add cash balance
         return total_value
@@ -77,14 +83,14 @@ class Portfolio:
         current_value = 0
         for index, row in self.holdings.iterrows():
             symbol = row['Symbol']
-            current_price = yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1]
+            current_price = self.get_current_price(symbol)
             current_value += row['Quantity'] * current_price
         return current_value - total_investment
 
     def print_portfolio(self):
         # Add current price, invested amount, current value, and % change to holdings for display
         holdings_with_values = self.holdings.copy()
-        holdings_with_values['Current Price'] = holdings_with_values['Symbol'].apply(lambda symbol: round(yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1], 2))
+        holdings_with_values['Current Price'] = holdings_with_values['Symbol'].apply(lambda symbol: round(self.get_current_price(symbol), 2))
         holdings_with_values['Invested Amount'] = round(holdings_with_values['Quantity'] * holdings_with_values['Buy Price'], 2)
         holdings_with_values['Current Value'] = round(holdings_with_values['Quantity'] * holdings_with_values['Current Price'], 2)
         holdings_with_values['% Change'] = round((holdings_with_values['Current Price'] - holdings_with_values['Buy Price']) / holdings_with_values['Buy Price'] * 100, 2)
@@ -101,7 +107,7 @@ class Portfolio:
     def save_portfolio_csv(self, filename="portfolio.csv"):
         # Add current price, invested amount, current value, and % change to holdings for saving
         holdings_with_values = self.holdings.copy()
-        holdings_with_values['Current Price'] = holdings_with_values['Symbol'].apply(lambda symbol: round(yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1], 2))
+        holdings_with_values['Current Price'] = holdings_with_values['Symbol'].apply(lambda symbol: round(self.get_current_price(symbol), 2))
         holdings_with_values['Invested Amount'] = round(holdings_with_values['Quantity'] * holdings_with_values['Buy Price'], 2)
         holdings_with_values['Current Value'] = round(holdings_with_values['Quantity'] * holdings_with_values['Current Price'], 2)
         holdings_with_values['% Change'] = round((holdings_with_values['Current Price'] - holdings_with_values['Buy Price']) / holdings_with_values['Buy Price'] * 100, 2)
@@ -117,7 +123,7 @@ class Portfolio:
     def generate_bar_graph(self):
     # Prepare data for bar graph
           symbols = self.holdings['Symbol']
-          current_prices = [round(yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1], 2) for symbol in symbols]
+          current_prices = [round(self.get_current_price(symbol), 2) for symbol in symbols]
           buy_prices = self.holdings['Buy Price']
           quantities = self.holdings['Quantity']
 
@@ -188,7 +194,7 @@ def main():
 
         if action == 'buy':
             symbol = input("Enter stock symbol: ").strip().upper()
-            current_price = yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1]
+            current_price = portfolio.get_current_price(symbol)
             print(f"Current market price (CMP) of {symbol} is ₹{current_price:.2f}")
             quantity = int(input("Enter quantity: "))
             buy_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -202,7 +208,7 @@ def main():
             portfolio.print_portfolio()
             symbol = input("Enter stock symbol from your holdings: ").strip().upper()
             quantity = int(input("Enter quantity: "))
-            current_price = yf.Ticker(symbol).history(period="1d")['Close'].iloc[-1]
+            current_price = portfolio.get_current_price(symbol)
             sell_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             success = portfolio.sell_stock(symbol, quantity, sell_date)
             if success:
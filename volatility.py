@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+ATR_PERIOD = 14
+STDDEV_WINDOW = 20
+RISK_PERCENT = 0.25  # Max risk per trade, % of capital
+
+def true_range(high, low, close):
+    """True range of (sessions x symbols) arrays; the first session's is just High - Low.
+
+    NaNs (symbols not yet listed, missing sessions) propagate only to their own cells.
+    """
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    previous_close = np.empty_like(close)
+    previous_close[0] = np.nan
+    previous_close[1:] = close[:-1]
+    tr = np.fmax(np.abs(high - previous_close), np.abs(low - previous_close))
+    return np.where(np.isnan(high - low), np.nan, np.fmax(high - low, tr))
+
+def wilder_smooth(values, period=ATR_PERIOD):
+    """Wilder's smoothing (alpha = 1/period) down axis 0, all columns in one pass per session.
+
+    Each column is seeded with its first valid value, like pandas'
+    ewm(alpha=1/period, adjust=False), and NaNs carry the last value forward.
+    """
+    values = np.asarray(values, dtype=float)
+    smoothed = np.empty_like(values)
+    state = np.full(values.shape[1:], np.nan)
+    alpha = 1 / period
+    for i, row in enumerate(values):
+        state = np.where(np.isnan(state), row, np.where(np.isnan(row), state, state + alpha * (row - state)))
+        smoothed[i] = state
+    return smoothed
+
+def atr(high, low, close, period=ATR_PERIOD):
+    return wilder_smooth(true_range(high, low, close), period)
+
+def returns_stddev(close, window=STDDEV_WINDOW):
+    """Rolling standard deviation of daily returns, as a fraction of price."""
+    close = pd.DataFrame(np.asarray(close, dtype=float))
+    return close.pct_change(fill_method=None).rolling(window, min_periods=2).std().to_numpy()
+
+def panel(histories, field):
+    """Aligns one OHLCV field of many histories into a (sessions x symbols) DataFrame."""
+    return pd.DataFrame({symbol: hist[field] for symbol, hist in histories.items()})
+
+def volatility_stops(highs, lows, closes, method='atr', multiplier=2.0, period=ATR_PERIOD, window=STDDEV_WINDOW):
+    """Stop loss per symbol `multiplier` ATRs or return standard deviations below the last close.
+
+    Args:
+        highs, lows, closes (DataFrame): Aligned (sessions x symbols) panels.
+        method (str): 'atr' or 'stddev'.
+
+    Returns:
+        Series: symbol -> stop loss price.
+    """
+    last_close = closes.ffill().iloc[-1].to_numpy()
+    if method == 'atr':
+        distance = multiplier * atr(highs, lows, closes, period)[-1]
+    elif method == 'stddev':
+        stddev = pd.DataFrame(returns_stddev(closes, window)).ffill().to_numpy()[-1]
+        distance = multiplier * stddev * last_close
+    else:
+        raise ValueError(f"Unknown volatility stop method {method}")
+    return pd.Series(last_close - distance, index=closes.columns)
+
+def intraday_stop(stop, price, previous_close, ema=None, ema_days=None, atr=None, closes=None,
+                  day_high=np.nan, day_low=np.nan, stop_percent=2.5, multiplier=2.0, period=ATR_PERIOD):
+    """Stop loss at a live price, finishing the previous session's indicators with today's price.
+
+    The EMA and ATR stops take one recursive step from the previous session's
+    `ema` (over `ema_days`) and `atr`; the stddev stop appends the price to the
+    previous `closes`. A missing day range falls back to the price itself.
+
+    Returns:
+        float: The stop, or None for a day_low stop without the day's low.
+    """
+    if stop == 'day_low':
+        return None if day_low is None or np.isnan(day_low) else day_low
+    if stop == 'last_close':
+        return previous_close
+    if stop == 'percent':
+        return price - (price * (stop_percent / 100))
+    if stop == 'ema':
+        return ema + 2 / (ema_days + 1) * (price - ema)
+    if stop == 'atr':
+        day_high, day_low = np.nanmax([day_high, price]), np.nanmin([day_low, price])
+        true_range = max(day_high - day_low, abs(day_high - previous_close), abs(day_low - previous_close))
+        return price - multiplier * (atr + (true_range - atr) / period)
+    if stop == 'stddev':
+        closes = np.append(closes, price)[-(STDDEV_WINDOW + 1):]
+        return price - multiplier * np.std(np.diff(closes) / closes[:-1], ddof=1) * price
+    raise ValueError(f"Unknown stop {stop}")
+
+def volatility_shares(capital, cmp, stop_loss, risk_percent=RISK_PERCENT, max_shares=None):
+    """Shares that risk `risk_percent` of capital between the CMP and the stop, vectorized.
+
+    Capped at `max_shares` (e.g. the %-change tier quantity) when given; zero
+    where the stop is not below the CMP.
+    """
+    cmp, stop_loss = np.asarray(cmp, dtype=float), np.asarray(stop_loss, dtype=float)
+    risk_per_share = cmp - stop_loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = np.where(risk_per_share > 0, np.floor(capital * risk_percent / 100 / risk_per_share), 0)
+    if max_shares is not None:
+        shares = np.minimum(shares, max_shares)
+    return shares.astype(int)